@@ -11,7 +11,9 @@ moving strongly against us (alarms) without regenerating the whole plan.
 """
 import asyncio
 import logging
-from datetime import datetime
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
 from typing import Dict, List, Optional
 
 from cache import CacheManager
@@ -26,17 +28,63 @@ logger = logging.getLogger("advisor")
 
 INDEX_BOARD = {"engine": "stock", "market": "index", "board": "SNDX"}
 HISTORY_DAYS = 400  # ~13 months of daily candles for 12-1 momentum
+# ISS history for the last days may still be unpublished: empty days this
+# recent are not logged as backfilled
+BACKFILL_SETTLE_DAYS = 3
+
+
+class RateLimiter:
+    """Token bucket for ISS: at most `rate` request starts per second
+    (bursts up to `concurrency`) and at most `concurrency` requests in
+    flight. Used as MOEXClient(throttle=...) — entered around each request,
+    the slot is held only for the request itself, not for a fixed sleep."""
+
+    def __init__(self, rate: float = 3.0, concurrency: int = 4):
+        self.rate = rate
+        self.capacity = float(max(1, concurrency))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._in_flight = asyncio.Semaphore(max(1, concurrency))
+
+    async def _take_token(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity,
+                                   self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+    async def __aenter__(self):
+        await self._in_flight.acquire()
+        try:
+            await self._take_token()
+        except BaseException:
+            self._in_flight.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self._in_flight.release()
+
+
+def make_throttle() -> RateLimiter:
+    cfg = CONFIG["advisor"]
+    return RateLimiter(rate=cfg["sync_rate"], concurrency=cfg["sync_concurrency"])
 
 
-def make_throttle(delay: float = 0.5):
-    """Sequential throttle: at most ~1/delay real HTTP requests per second"""
-    sem = asyncio.Semaphore(1)
-
-    async def throttle():
-        async with sem:
-            await asyncio.sleep(delay)
-
-    return throttle
+@contextmanager
+def stage(name: str):
+    """Log the wall time of a pipeline stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        logger.info(f"Stage '{name}' took {time.perf_counter() - started:.1f}s")
 
 
 def build_universe(equities: List[str]) -> List[Dict]:
@@ -61,7 +109,7 @@ async def sync_candles(client: MOEXClient, db: Database,
     if not board_market:
         board_market = {"board": "TQBR", "market": "shares", "engine": "stock"}
 
-    candles = await client.get_candles(
+    candles = await client.get_candles_arrays(
         secid,
         board=board_market.get("board", "TQBR"),
         market=board_market.get("market", "shares"),
@@ -71,13 +119,75 @@ async def sync_candles(client: MOEXClient, db: Database,
         use_cache=False,
     )
 
-    if candles:
-        await db.insert_candles(candles)
+    if len(candles):
+        await db.insert_candle_arrays(secid, candles)
         return True
     # Existing history still counts as data
     return last_date is not None
 
 
+async def sync_asset(client: MOEXClient, db: Database, asset: Dict) -> bool:
+    """sync_candles for one universe entry; switches to the fallback
+    instrument when the primary has no data, marks data_missing otherwise."""
+    secid = asset["secid"]
+    try:
+        ok = await sync_candles(client, db, secid)
+        if not ok and asset.get("fallback"):
+            logger.info(f"{secid}: trying fallback instrument {asset['fallback']}")
+            asset["secid"] = asset["fallback"]
+            ok = await sync_candles(client, db, asset["secid"])
+    except Exception as e:
+        logger.error(f"Candle sync failed for {secid}: {e}")
+        ok = False
+    if not ok:
+        asset["data_missing"] = True
+    return ok
+
+
+async def backfill_board(client: MOEXClient, db: Database, board_spec: str,
+                         days: int = HISTORY_DAYS, till: Optional[date] = None) -> Dict:
+    """
+    Fill candles for every security of a board ("engine/market/board")
+    from ISS history by date: one paginated request per trading day
+    instead of one candle request per security. Days already in
+    backfill_log are skipped; `till` defaults to yesterday, today is left
+    to sync_candles. Empty days newer than BACKFILL_SETTLE_DAYS are not
+    logged, so the next run checks them again.
+    """
+    engine, market, board = board_spec.split("/")
+    till = till or datetime.now().date() - timedelta(days=1)
+    start = till - timedelta(days=days - 1)
+    settled = (datetime.now().date() - timedelta(days=BACKFILL_SETTLE_DAYS)).isoformat()
+    done = await db.get_backfilled_dates(board, start.isoformat(), till.isoformat())
+    dates = [d.isoformat() for d in (start + timedelta(days=i) for i in range(days))
+             if d.isoformat() not in done]
+    result = {"board": board, "skipped": len(done), "filled": 0, "pending": 0,
+              "failed": 0, "candles": 0}
+
+    async def fill_day(trade_date: str):
+        try:
+            candles = await client.get_board_history(
+                trade_date, board=board, market=market, engine=engine, use_cache=False)
+            if not candles and trade_date > settled:
+                # A holiday or a day ISS has not published yet: re-check later
+                result["pending"] += 1
+                return
+            await db.insert_board_day(board, trade_date, candles)
+        except Exception as e:
+            logger.error(f"Backfill of {board} {trade_date} failed: {e}")
+            result["failed"] += 1
+            return
+        result["filled"] += 1
+        result["candles"] += len(candles)
+
+    # The client throttle bounds how many days are fetched at once
+    await asyncio.gather(*(fill_day(d) for d in dates))
+    logger.info(f"Backfill {board}: {result['filled']} days filled ({result['candles']} candles), "
+                f"{result['skipped']} already done, {result['pending']} empty and recent, "
+                f"{result['failed']} failed")
+    return result
+
+
 async def compute_dividend_yield(client: MOEXClient, secid: str,
                                  price: Optional[float]) -> Optional[float]:
     """Trailing 12m dividends / current price, as a fraction"""
@@ -108,9 +218,11 @@ async def evaluate_previous_report(db: Database, week_start: str,
         return None
 
     evaluated = []
+    latest_closes = await db.get_latest_close_many(
+        [reco["secid"] for reco in previous["recommendations"]])
     for reco in previous["recommendations"]:
         price_at_reco = reco.get("price_at_reco")
-        latest = await db.get_latest_close(reco["secid"])
+        latest = latest_closes.get(reco["secid"])
         if not price_at_reco or not latest or not latest.get("close"):
             continue
         price_now = latest["close"]
@@ -157,60 +269,58 @@ def weekly_index_return(closes: List[float]) -> Optional[float]:
 
 
 async def run_weekly_pipeline(week_start: str = None):
+    db = Database()
+    try:
+        return await _weekly_pipeline(db, week_start)
+    finally:
+        await db.close()
+
+
+async def _weekly_pipeline(db: Database, week_start: str = None):
     cfg = CONFIG["advisor"]
     week_start = week_start or datetime.now().date().isoformat()
     logger.info(f"Weekly advisor pipeline started for {week_start}")
 
-    db = Database()
     await db.init_db()
     cache = CacheManager()
     predictor = MLPredictor()
 
     failed: List[str] = []
 
-    async with MOEXClient(cache_manager=cache, throttle=make_throttle(0.5)) as client:
-        # 1-2. CBR key rate (7-day cache, fallback to last known)
-        rate_history = await fetch_key_rate_history(months=4, cache=cache)
-        cbr_rate, cbr_rate_3m_ago = rate_now_and_3m_ago(rate_history)
-
-        # 3. Universe: index constituents + bonds + money market + gold
-        index_rows = await client.get_index_securities(cfg["index"])
-        equities = [r.get("ticker") for r in index_rows if r.get("ticker")]
-        if not equities:
-            logger.error("Could not load index constituents, aborting")
-            raise RuntimeError("empty universe")
-        universe = build_universe(equities)
-
-        # 4. Index monthly candles for the 10-month SMA regime
-        index_monthly = await client.get_candles(
-            cfg["index"], interval=31, days=420, use_cache=False, **INDEX_BOARD)
-        index_monthly_closes = [c["close"] for c in index_monthly if c.get("close")]
-
-        # Index daily candles (benchmark for evaluation)
-        await db.insert_candles(await client.get_candles(
-            cfg["index"], interval=24, days=30, use_cache=False, **INDEX_BOARD))
-
-        # 5. Incremental candle sync (throttled)
-        for asset in universe:
-            secid = asset["secid"]
-            try:
-                ok = await sync_candles(client, db, secid)
-                if not ok and asset.get("fallback"):
-                    logger.info(f"{secid}: trying fallback instrument {asset['fallback']}")
-                    asset["secid"] = asset["fallback"]
-                    ok = await sync_candles(client, db, asset["secid"])
-                if not ok:
-                    failed.append(secid)
-                    asset["data_missing"] = True
-            except Exception as e:
-                logger.error(f"Candle sync failed for {secid}: {e}")
-                failed.append(secid)
-                asset["data_missing"] = True
+    async with MOEXClient(cache_manager=cache, throttle=make_throttle()) as client:
+        with stage("universe"):
+            # 1-2. CBR key rate (7-day cache, fallback to last known)
+            rate_history = await fetch_key_rate_history(months=4, cache=cache)
+            cbr_rate, cbr_rate_3m_ago = rate_now_and_3m_ago(rate_history)
+
+            # 3. Universe: index constituents + bonds + money market + gold
+            index_rows = await client.get_index_securities(cfg["index"])
+            equities = [r.get("ticker") for r in index_rows if r.get("ticker")]
+            if not equities:
+                logger.error("Could not load index constituents, aborting")
+                raise RuntimeError("empty universe")
+            universe = build_universe(equities)
+
+            # 4. Index monthly candles for the 10-month SMA regime
+            index_monthly = await client.get_candles(
+                cfg["index"], interval=31, days=420, use_cache=False, **INDEX_BOARD)
+            index_monthly_closes = [c["close"] for c in index_monthly if c.get("close")]
+
+            # Index daily candles (benchmark for evaluation)
+            await db.insert_candles(await client.get_candles(
+                cfg["index"], interval=24, days=30, use_cache=False, **INDEX_BOARD))
+
+        # 5. Incremental candle sync: fanned out, the limiter paces ISS
+        with stage("candle sync"):
+            secids = [asset["secid"] for asset in universe]
+            synced = await asyncio.gather(*(sync_asset(client, db, asset) for asset in universe))
+            failed += [secid for secid, ok in zip(secids, synced) if not ok]
 
         # 6. Evaluate the PREVIOUS report against reality
-        index_closes = await db.get_closes(cfg["index"], days=30)
-        benchmark = weekly_index_return(index_closes)
-        evaluation = await evaluate_previous_report(db, week_start, benchmark)
+        with stage("evaluation"):
+            index_closes = await db.get_closes(cfg["index"], days=30)
+            benchmark = weekly_index_return(index_closes)
+            evaluation = await evaluate_previous_report(db, week_start, benchmark)
 
         # 7. Regime and allocation
         reg = strategy.regime(index_monthly_closes, cbr_rate, cbr_rate_3m_ago,
@@ -226,6 +336,9 @@ async def run_weekly_pipeline(week_start: str = None):
 
         # 8. Per-asset components
         assets: List[Dict] = []
+        all_closes = await db.get_closes_many(
+            [a["secid"] for a in universe if not a.get("data_missing")],
+            days=HISTORY_DAYS + 50)
         for asset in universe:
             secid = asset["secid"]
             entry = {**asset, "components": {}}
@@ -234,7 +347,7 @@ async def run_weekly_pipeline(week_start: str = None):
                 assets.append(entry)
                 continue
 
-            closes = await db.get_closes(secid, days=HISTORY_DAYS + 50)
+            closes = all_closes[secid]
             if len(closes) < 30:
                 entry["components"]["data_missing"] = True
                 assets.append(entry)
@@ -242,7 +355,7 @@ async def run_weekly_pipeline(week_start: str = None):
 
             mom = strategy.tsmom(closes)
             vol = strategy.ann_vol(closes)
-            entry["price"] = closes[-1]
+            entry["price"] = float(closes[-1])
             entry["closes"] = closes
             entry["components"].update({
                 "m3": mom["m3"],
@@ -252,15 +365,21 @@ async def run_weekly_pipeline(week_start: str = None):
             })
 
             if asset["asset_class"] == "equity":
-                div_yield = await compute_dividend_yield(client, secid, entry["price"])
                 sent_raw = await db.get_mean_sentiment(secid, days=14)
-                entry["components"]["div_yield"] = round(div_yield, 4) if div_yield else None
                 entry["components"]["sentiment_posts"] = sent_raw["n"]
                 entry["components"]["sentiment"] = strategy.sentiment_score(
                     sent_raw["positive"], sent_raw["negative"], sent_raw["n"],
                     min_posts=cfg["sentiment_min_posts"])
             assets.append(entry)
 
+        # Trailing dividends: one ISS call per equity, fanned out
+        with stage("dividends"):
+            priced = [a for a in assets if a["asset_class"] == "equity" and a.get("price")]
+            div_yields = await asyncio.gather(
+                *(compute_dividend_yield(client, a["secid"], a["price"]) for a in priced))
+            for entry, div_yield in zip(priced, div_yields):
+                entry["components"]["div_yield"] = round(div_yield, 4) if div_yield else None
+
     # Cross-sectional ranks over equities only
     equity_assets = [a for a in assets if a["asset_class"] == "equity"
                      and not a["components"].get("data_missing")]
@@ -269,6 +388,13 @@ async def run_weekly_pipeline(week_start: str = None):
     vols = {a["secid"]: a["components"]["vol_ann"] for a in equity_assets}
     vol_pct = strategy.xsec_rank(vols)
 
+    # 9. Chronos quantile zones for the "forecast vs fact" check next week,
+    # the whole universe in a few batched forward passes
+    with stage("forecast"):
+        forecasts = predictor.predict_many(
+            {a["secid"]: a["closes"] for a in assets if a.get("closes") is not None},
+            days=7, batch_size=cfg["forecast_batch_size"])
+
     recommendations: List[Dict] = []
     for asset in assets:
         secid = asset["secid"]
@@ -299,12 +425,9 @@ async def run_weekly_pipeline(week_start: str = None):
         comp["composite"] = result["composite"]
         comp["vetoed"] = result["vetoed"]
 
-        # 9. Chronos quantile zone for the "forecast vs fact" check next week
         forecast_low = forecast_median = forecast_high = None
-        closes = asset.get("closes")
-        if closes:
-            forecast, _, model_type = predictor.predict(
-                [{"close": c} for c in closes], days=7)
+        if secid in forecasts:
+            forecast, _, model_type = forecasts[secid]
             if forecast.get("median"):
                 forecast_low = round(forecast["low"][-1], 4)
                 forecast_median = round(forecast["median"][-1], 4)
@@ -346,10 +469,17 @@ async def run_weekly_pipeline(week_start: str = None):
 async def run_midweek_pipeline():
     """Thursday: check the current week's recommendations, raise alarms on
     strong adverse moves. Does not regenerate the plan."""
+    db = Database()
+    try:
+        return await _midweek_pipeline(db)
+    finally:
+        await db.close()
+
+
+async def _midweek_pipeline(db: Database):
     cfg = CONFIG["advisor"]
     logger.info("Midweek check started")
 
-    db = Database()
     await db.init_db()
     cache = CacheManager()
 
@@ -361,25 +491,40 @@ async def run_midweek_pipeline():
     alarms: List[Dict] = []
     interim: List[Dict] = []
 
-    async with MOEXClient(cache_manager=cache, throttle=make_throttle(0.5)) as client:
-        for reco in latest["recommendations"]:
+    async def sync_one(secid: str):
+        try:
+            await sync_candles(client, db, secid)
+        except Exception as e:
+            logger.error(f"Midweek sync failed for {secid}: {e}")
+
+    async with MOEXClient(cache_manager=cache, throttle=make_throttle()) as client:
+        recos = [r for r in latest["recommendations"] if r.get("price_at_reco")]
+        secids = [r["secid"] for r in recos]
+        # One board snapshot per board instead of a candle sync per reco;
+        # only securities missing from the snapshots fall back to candles
+        with stage("midweek snapshot"):
+            prices_now = await client.get_last_prices(secids, db=db, live=True)
+        missing = [secid for secid in secids if secid not in prices_now]
+        if missing:
+            with stage("midweek sync"):
+                await asyncio.gather(*(sync_one(secid) for secid in missing))
+            latest_closes = await db.get_latest_close_many(missing)
+            for secid, latest_close in latest_closes.items():
+                if latest_close and latest_close.get("close"):
+                    prices_now[secid] = latest_close["close"]
+
+        for reco in recos:
             secid = reco["secid"]
-            price_at_reco = reco.get("price_at_reco")
-            if not price_at_reco:
-                continue
-            try:
-                await sync_candles(client, db, secid)
-            except Exception as e:
-                logger.error(f"Midweek sync failed for {secid}: {e}")
-            latest_close = await db.get_latest_close(secid)
-            if not latest_close or not latest_close.get("close"):
+            price_at_reco = reco["price_at_reco"]
+            price_now = prices_now.get(secid)
+            if not price_now:
                 continue
-            move = latest_close["close"] / price_at_reco - 1.0
+            move = price_now / price_at_reco - 1.0
             row = {
                 "secid": secid,
                 "action": reco["action"],
                 "price_at_reco": price_at_reco,
-                "price_now": latest_close["close"],
+                "price_now": price_now,
                 "interim_return": round(move, 4),
             }
             interim.append(row)
@@ -402,3 +547,21 @@ async def run_midweek_pipeline():
     logger.info(f"Midweek report {report_id} saved: {len(alarms)} alarms")
 
     return report_id
+
+
+async def run_backfill(boards: Optional[List[str]] = None, days: Optional[int] = None):
+    """Onboard whole boards: history-by-date backfill of their candles
+    (defaults: advisor.backfill_boards / backfill_days)"""
+    cfg = CONFIG["advisor"]
+    db = Database()
+    try:
+        await db.init_db()
+        results = []
+        async with MOEXClient(throttle=make_throttle()) as client:
+            for board_spec in boards or cfg["backfill_boards"]:
+                with stage(f"backfill {board_spec}"):
+                    results.append(await backfill_board(
+                        client, db, board_spec, days or cfg["backfill_days"]))
+        return results
+    finally:
+        await db.close()
@@ -0,0 +1,97 @@
+"""
+Bounded executor for CPU-bound analytics in the web process
+
+Indicators and the Chronos forward pass run on a small thread pool (torch,
+numpy and TA-Lib release the GIL) instead of inside the async handler, so a
+slow forecast no longer stalls every other request. Admission is bounded:
+with `workers` jobs running and `max_queue` waiting, new jobs are rejected
+with AnalyticsBusy (the routes answer 503) rather than piling up; a job past
+its time budget raises AnalyticsTimeout (504).
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class AnalyticsUnavailable(Exception):
+    """The pool could not produce a result: AnalyticsBusy or AnalyticsTimeout"""
+
+
+class AnalyticsBusy(AnalyticsUnavailable):
+    """Pool saturated: the caller should answer 503 and let the client retry"""
+
+
+class AnalyticsTimeout(AnalyticsUnavailable):
+    """The job exceeded its time budget (it still finishes in the background);
+    the caller should answer 504"""
+
+
+class AnalyticsPool:
+    def __init__(self, workers: int = 2, max_queue: int = 8, timeout: float = 30.0):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.logger = logging.getLogger("analytics")
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analytics")
+        # Jobs submitted and not yet finished, including timed-out ones that
+        # still occupy a worker thread
+        self._pending = 0
+        self._submitted = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._run_total = 0.0
+        self._run_max = 0.0
+        self._completed = 0
+
+    async def run(self, fn: Callable, *args, timeout: float = None) -> Any:
+        """fn(*args) on the pool; AnalyticsBusy if saturated, AnalyticsTimeout
+        if it takes longer than `timeout` seconds (default: pool timeout)"""
+        if self._pending >= self.workers + self.max_queue:
+            self._rejected += 1
+            raise AnalyticsBusy(f"analytics queue is full ({self._pending} jobs)")
+        self._pending += 1
+        self._submitted += 1
+        future = asyncio.get_running_loop().run_in_executor(self._executor, self._timed, fn, *args)
+        future.add_done_callback(self._done)
+        try:
+            # shield: a timeout abandons the wait, not the running job
+            return await asyncio.wait_for(asyncio.shield(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            self.logger.warning(f"Analytics job {getattr(fn, '__name__', fn)} timed out "
+                                f"after {timeout or self.timeout}s")
+            raise AnalyticsTimeout(f"analytics job timed out after {timeout or self.timeout}s")
+
+    def _timed(self, fn: Callable, *args) -> Any:
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._run_total += elapsed
+            self._run_max = max(self._run_max, elapsed)
+            self._completed += 1
+
+    def _done(self, future: asyncio.Future):
+        self._pending -= 1
+        # Retrieve the exception so abandoned (timed-out) jobs do not warn
+        if not future.cancelled() and future.exception() is not None:
+            self.logger.debug(f"Analytics job failed: {future.exception()}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'workers': self.workers,
+            'max_queue': self.max_queue,
+            'pending': self._pending,
+            'submitted': self._submitted,
+            'completed': self._completed,
+            'rejected': self._rejected,
+            'timeouts': self._timeouts,
+            'run_avg_ms': round(self._run_total / self._completed * 1000, 2) if self._completed else 0.0,
+            'run_max_ms': round(self._run_max * 1000, 2),
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
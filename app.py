@@ -6,22 +6,26 @@ here. Review parsing/analysis and the weekly advisor run in the celery
 worker (see tasks.py / advisor.py); job state is shared through redis.
 """
 import json
+import time
+import asyncio
 import gettext
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple
 
 import numpy as np
 import redis.asyncio as aioredis
 from quart import Quart, Response, jsonify, redirect, render_template, request, send_from_directory
 
+from analytics_pool import AnalyticsPool, AnalyticsTimeout, AnalyticsUnavailable
 from cache import CacheManager
+from candles import INTERVAL_MINUTES, CandleArrays, from_epoch
 from celery_app import app as celery
 from database import Database
 from indicators import IndicatorAnalyzer
 from jobstore import JobStore, new_job
 from ml_models import MLPredictor
-from moex_api import MOEXClient
+from moex_api import MOEXClient, create_session
 from settings import CONFIG, REDIS_URL
 
 """
@@ -51,40 +55,68 @@ class InvestmentAnalyzer:
         self.ml_predictor = MLPredictor()
         self.indicator_analyzer = IndicatorAnalyzer()
         self.cache = CacheManager()
+        # CPU-bound indicators/forecasts run here, off the event loop
+        web = CONFIG["web"]
+        self.analytics = AnalyticsPool(workers=web["analytics_workers"],
+                                       max_queue=web["analytics_queue"],
+                                       timeout=web["analytics_timeout"])
+        # App-lifetime ISS client; its pooled session is opened in init()
+        # because aiohttp sessions must be created inside the running loop
+        self.moex: MOEXClient = None
+        # secid -> (monotonic time of the last 1-minute bar sync, oldest
+        # window start the store is known to hold bars from)
+        self._minute_synced: Dict[str, Tuple[float, date]] = {}
+        # secid -> background load of the older part of its window; at most
+        # intraday_backfills of them walk ISS at a time
+        self._minute_backfills: Dict[str, asyncio.Future] = {}
+        self._backfill_slots = asyncio.Semaphore(web["intraday_backfills"])
 
     async def init(self):
         await self.db.init_db()
+        self.cache.migrate()
         self.cache.clear_expired()
+        self.moex = MOEXClient(cache_manager=self.cache, session=create_session(),
+                               stale_hours=CONFIG["web"]["iss_stale_hours"],
+                               negative_ttl=CONFIG["web"]["iss_negative_ttl"])
         logger.info("Application initialized")
 
+    async def close(self):
+        # Background minute backfills use the session and the database
+        for task in list(self._minute_backfills.values()):
+            task.cancel()
+        await asyncio.gather(*self._minute_backfills.values(), return_exceptions=True)
+        if self.moex and self.moex.session:
+            await self.moex.session.close()
+        await self.db.close()
+        self.analytics.close()
+
     async def get_security_data(self, secid: str, days: int = 60) -> Dict:
         """Get security data with indicators and forecast zone"""
         try:
-            # Get candles from database or API
-            candles = await self.db.get_candles(secid, days=days)
+            # Get candles from database or API (columnar, see candles.py)
+            candles = await self.db.get_candles_arrays(secid, days=days)
 
-            if not candles or len(candles) < 20:
+            if len(candles) < 20:
                 # Fetch from MOEX API
-                async with MOEXClient(cache_manager=self.cache) as client:
-                    board_market = await client.get_security_board_market(secid, db=self.db)
-                    if not board_market:
-                        return {'error': 'Не удалось определить режим торговли для бумаги'}
-
-                    board = board_market.get('board', 'TQBR')
-                    market = board_market.get('market', 'shares')
-                    engine = board_market.get('engine', 'stock')
-
-                    new_candles = await client.get_candles(
-                        secid,
-                        board=board,
-                        market=market,
-                        engine=engine,
-                        days=days,
-                        interval=24
-                    )
-                    if new_candles:
-                        await self.db.insert_candles(new_candles)
-                        candles = new_candles
+                board_market = await self.moex.get_security_board_market(secid, db=self.db)
+                if not board_market:
+                    return {'error': 'Не удалось определить режим торговли для бумаги'}
+
+                board = board_market.get('board', 'TQBR')
+                market = board_market.get('market', 'shares')
+                engine = board_market.get('engine', 'stock')
+
+                new_candles = await self.moex.get_candles_arrays(
+                    secid,
+                    board=board,
+                    market=market,
+                    engine=engine,
+                    days=days,
+                    interval=24
+                )
+                if len(new_candles):
+                    await self.db.insert_candle_arrays(secid, new_candles)
+                    candles = new_candles
 
             if not candles:
                 return {'error': 'Не удалось получить данные'}
@@ -92,53 +124,59 @@ class InvestmentAnalyzer:
             # Get security info
             security = await self.db.get_security(secid)
             if not security:
-                async with MOEXClient(cache_manager=self.cache) as client:
-                    board_market = await client.get_security_board_market(secid, db=self.db)
-                    if board_market:
-                        board = board_market.get('board', 'TQBR')
-                        market = board_market.get('market', 'shares')
-                        engine = board_market.get('engine', 'stock')
-                        info = await client.get_security_info(secid, board=board, market=market)
-                    else:
-                        board, market, engine = 'TQBR', 'shares', 'stock'
-                        info = await client.get_security_info(secid)
-
-                    if info:
-                        await self.db.insert_security({
-                            'secid': secid,
-                            'secname': info.get('SECNAME', secid),
-                            'isin': info.get('ISIN'),
-                            'prevprice': float(info.get('PREVPRICE', 0)) if info.get('PREVPRICE') else None,
-                            'currencyid': info.get('CURRENCYID', 'RUB'),
-                            'sectype': info.get('SECTYPE'),
-                            'lotsize': int(info.get('LOTSIZE', 1)) if info.get('LOTSIZE') else 1,
-                            'prevdate': datetime.now().date().isoformat(),
-                            'board': board,
-                            'market': market,
-                            'engine': engine
-                        })
-                        security = await self.db.get_security(secid)
-
-            # Calculate indicators
-            indicators = self.indicator_analyzer.analyze_all(candles)
-
-            # Quantile price zone (Chronos-Bolt; SMA fallback)
-            forecast, confidence, model_type = self.ml_predictor.predict(
-                candles, days=7)
+                board_market = await self.moex.get_security_board_market(secid, db=self.db)
+                if board_market:
+                    board = board_market.get('board', 'TQBR')
+                    market = board_market.get('market', 'shares')
+                    engine = board_market.get('engine', 'stock')
+                    info = await self.moex.get_security_info(secid, board=board, market=market)
+                else:
+                    board, market, engine = 'TQBR', 'shares', 'stock'
+                    info = await self.moex.get_security_info(secid)
+
+                if info:
+                    await self.db.insert_security({
+                        'secid': secid,
+                        'secname': info.get('SECNAME', secid),
+                        'isin': info.get('ISIN'),
+                        'prevprice': float(info.get('PREVPRICE', 0)) if info.get('PREVPRICE') else None,
+                        'currencyid': info.get('CURRENCYID', 'RUB'),
+                        'sectype': info.get('SECTYPE'),
+                        'lotsize': int(info.get('LOTSIZE', 1)) if info.get('LOTSIZE') else 1,
+                        'prevdate': datetime.now().date().isoformat(),
+                        'board': board,
+                        'market': market,
+                        'engine': engine
+                    })
+                    security = await self.db.get_security(secid)
+
+            # Forecast memo: in-process LRU first, then forecast_memo rows
+            # computed from the same candle window; Chronos only on a full miss
+            await self._load_stored_forecast(secid, candles)
+            indicators, ((forecast, confidence, model_type), fresh) = await self.analytics.run(
+                self._analyze_candles, secid, candles)
             medians = forecast.get('median', [])
 
-            # Save predictions
-            for i, pred_price in enumerate(medians):
-                pred_date = (datetime.now() +
-                             timedelta(days=i+1)).date().isoformat()
-                await self.db.save_prediction(
-                    secid, pred_date, pred_price, confidence, model_type,
-                    low_price=forecast['low'][i], high_price=forecast['high'][i]
-                )
+            # Save predictions (only when actually recomputed), one transaction
+            if fresh:
+                key = self.ml_predictor.forecast_key(secid, candles, days=7)
+                if key is not None and model_type != 'none':
+                    await self.db.save_forecast_memo(key, (forecast, confidence, model_type))
+                await self.db.save_predictions(secid, [
+                    {
+                        'prediction_date': (datetime.now() + timedelta(days=i+1)).date().isoformat(),
+                        'predicted_price': pred_price,
+                        'low_price': forecast['low'][i],
+                        'high_price': forecast['high'][i],
+                        'confidence': confidence,
+                        'model_type': model_type,
+                    }
+                    for i, pred_price in enumerate(medians)
+                ])
 
             return {
                 'security': security,
-                'candles': candles[-60:],  # Last 60 candles for better charts
+                'candles': candles.tail(60).to_records(secid),  # Last 60 candles for better charts
                 'indicators': indicators,
                 'predictions': [
                     {
@@ -152,29 +190,143 @@ class InvestmentAnalyzer:
                 'confidence': round(confidence, 2) if confidence else 0.0,
                 'model_type': model_type
             }
+        except AnalyticsUnavailable:
+            raise
         except Exception as e:
             logger.error(f"Error getting security data: {e}")
             return {'error': str(e)}
 
+    async def get_intraday_indicators(self, secid: str, interval: int, days: int) -> Dict:
+        """Indicators on 1/10/60-minute or daily bars, all resampled from the
+        stored 1-minute bars; ISS is asked only for minutes not stored yet.
+        While older bars are still loading the answer has 'backfilling'."""
+        try:
+            backfilling = await self._sync_minute_candles(secid, days)
+            candles = await self.db.get_candles_interval(secid, interval, days)
+            if not len(candles):
+                return {'error': 'Не удалось получить данные', 'backfilling': backfilling}
+            indicators = await self.analytics.run(self.indicator_analyzer.analyze_all, candles)
+            return {
+                'secid': secid,
+                'interval': interval,
+                'candles': candles.tail(60).to_records(secid),
+                'indicators': indicators,
+                'backfilling': backfilling,
+            }
+        except AnalyticsUnavailable:
+            raise
+        except Exception as e:
+            logger.error(f"Error getting intraday indicators for {secid}: {e}")
+            return {'error': str(e)}
+
+    async def _sync_minute_candles(self, secid: str, days: int) -> bool:
+        """Fetch 1-minute bars newer than the store, at most once per
+        interval per security. The request itself only fetches the last
+        `intraday_sync_days`; a part of the window the store lacks (first
+        look at a security, or a gap after downtime) is loaded by a
+        background task. Returns True while that backfill runs."""
+        web = CONFIG["web"]
+        now = time.monotonic()
+        today = datetime.now().date()
+        window_start = today - timedelta(days=days)
+        synced_at, reached = self._minute_synced.get(secid, (float('-inf'), today))
+        backfilling = secid in self._minute_backfills
+        due = now - synced_at >= web["intraday_sync_seconds"]
+        if not due and (backfilling or reached <= window_start):
+            return backfilling
+
+        recent_start = today - timedelta(days=web["intraday_sync_days"])
+        first, last = await self.db.get_minute_span(secid)
+        if due:
+            if len(self._minute_synced) > 1000:
+                self._minute_synced = {k: v for k, v in self._minute_synced.items()
+                                       if now - v[0] < web["intraday_sync_seconds"]}
+            self._minute_synced[secid] = (now, reached)
+            from_date = recent_start if last is None else max(recent_start, from_epoch(last).date())
+            await self._fetch_minute_candles(secid, from_date)
+        if backfilling or reached <= window_start:
+            return backfilling
+
+        if first is None or from_epoch(first).date() > window_start:
+            gap_start = window_start
+        else:
+            gap_start = from_epoch(last).date()
+        if gap_start >= recent_start:
+            self._minute_synced[secid] = (self._minute_synced[secid][0], window_start)
+            return False
+        self._start_minute_backfill(secid, gap_start, recent_start, window_start)
+        return True
+
+    def _start_minute_backfill(self, secid: str, from_date: date, till_date: date, window_start: date):
+        async def backfill():
+            try:
+                async with self._backfill_slots:
+                    # strict: a page that fails mid-walk must not leave a
+                    # hole that is then recorded as stored
+                    await self._fetch_minute_candles(secid, from_date, till_date, strict=True)
+            except Exception as e:
+                logger.error(f"Error backfilling 1-minute candles for {secid}: {e}")
+                return
+            # The window now counts as stored even if its first days had no
+            # trading, so a weekend window start does not re-trigger this
+            synced_at, reached = self._minute_synced.get(secid, (float('-inf'), window_start))
+            self._minute_synced[secid] = (synced_at, min(reached, window_start))
+
+        task = asyncio.ensure_future(backfill())
+        self._minute_backfills[secid] = task
+        task.add_done_callback(lambda _: self._minute_backfills.pop(secid, None))
+
+    async def _fetch_minute_candles(self, secid: str, from_date: date, till_date: date = None,
+                                    strict: bool = False):
+        board_market = await self.moex.get_security_board_market(secid, db=self.db) or {}
+        candles = await self.moex.get_candles_arrays(
+            secid,
+            board=board_market.get('board', 'TQBR'),
+            market=board_market.get('market', 'shares'),
+            engine=board_market.get('engine', 'stock'),
+            interval=1,
+            from_date=from_date.isoformat(),
+            till_date=till_date.isoformat() if till_date else None,
+            use_cache=False,
+            strict=strict
+        )
+        await self.db.insert_minute_candles(secid, candles)
+
+    def _analyze_candles(self, secid: str, candles: CandleArrays):
+        """Indicators + quantile price zone (Chronos-Bolt; SMA fallback)
+        through the forecast memo; runs on the analytics pool"""
+        indicators = self.indicator_analyzer.analyze_all(candles)
+        return indicators, self.ml_predictor.predict_memo(secid, candles, days=7)
+
+    async def _load_stored_forecast(self, secid: str, candles: CandleArrays):
+        """Seed the memo from forecast_memo after a restart / in another worker"""
+        memo = self.ml_predictor.memo
+        key = self.ml_predictor.forecast_key(secid, candles, days=7)
+        if key is None or key in memo:
+            return
+        stored = await self.db.get_forecast_memo(key)
+        if stored is not None:
+            memo.put(key, stored)
+            memo.db_loads += 1
+
     async def get_indexes(self) -> List[Dict]:
         """Get available indexes"""
         try:
-            async with MOEXClient(cache_manager=self.cache) as client:
-                indexes = await client.get_indexes()
-                # Filter current month indexes
-                current_month = datetime.now().month
-                current_year = datetime.now().year
-                filtered = []
-                for idx in indexes:
-                    till_date = idx.get('till')
-                    if till_date:
-                        try:
-                            dt = datetime.strptime(till_date, '%Y-%m-%d')
-                            if dt.month == current_month and dt.year == current_year:
-                                filtered.append(idx)
-                        except Exception:
-                            pass
-                return filtered[:50]  # Limit to 50
+            indexes = await self.moex.get_indexes()
+            # Filter current month indexes
+            current_month = datetime.now().month
+            current_year = datetime.now().year
+            filtered = []
+            for idx in indexes:
+                till_date = idx.get('till')
+                if till_date:
+                    try:
+                        dt = datetime.strptime(till_date, '%Y-%m-%d')
+                        if dt.month == current_month and dt.year == current_year:
+                            filtered.append(idx)
+                    except Exception:
+                        pass
+            return filtered[:50]  # Limit to 50
         except Exception as e:
             logger.error(f"Error getting indexes: {e}")
             return []
@@ -182,8 +334,7 @@ class InvestmentAnalyzer:
     async def get_index_securities(self, indexid: str) -> List[Dict]:
         """Get securities in an index"""
         try:
-            async with MOEXClient(cache_manager=self.cache) as client:
-                return await client.get_index_securities(indexid, limit=100)
+            return await self.moex.get_index_securities(indexid, limit=100)
         except Exception as e:
             logger.error(f"Error getting index securities: {e}")
             return []
@@ -253,6 +404,16 @@ def json_response(data, status: int = 200) -> Response:
     )
 
 
+def unavailable_response(error: AnalyticsUnavailable) -> Response:
+    """504 for an analytics job past its time budget; 503 for a saturated
+    pool, which the client retries later"""
+    if isinstance(error, AnalyticsTimeout):
+        return json_response({'error': str(error), 'timeout': True}, status=504)
+    resp = json_response({'error': str(error), 'busy': True}, status=503)
+    resp.headers['Retry-After'] = '5'
+    return resp
+
+
 analyzer = InvestmentAnalyzer()
 app = Quart(
     __name__,
@@ -277,6 +438,11 @@ async def on_startup():
     job_store = JobStore(aioredis.from_url(REDIS_URL))
 
 
+@app.after_serving
+async def on_shutdown():
+    await analyzer.close()
+
+
 @app.route('/')
 async def index_handler():
     locale = request.cookies.get("lang", "en")
@@ -309,15 +475,31 @@ async def api_index_securities_handler(indexid):
 @app.route('/api/security/<secid>')
 async def api_security_handler(secid):
     days = int(request.args.get('days', 60))
-    data = await analyzer.get_security_data(secid.upper(), days=days)
+    try:
+        data = await analyzer.get_security_data(secid.upper(), days=days)
+    except AnalyticsUnavailable as e:
+        return unavailable_response(e)
+    return json_response(data)
+
+
+@app.route('/api/security/<secid>/indicators')
+async def api_intraday_indicators_handler(secid):
+    """?interval=1|10|60|24 (ISS codes), ?days= window of 1-minute bars"""
+    interval = int(request.args.get('interval', 60))
+    if interval not in INTERVAL_MINUTES:
+        return json_response({'error': f'interval must be one of {list(INTERVAL_MINUTES)}'}, status=400)
+    days = min(max(int(request.args.get('days', 5)), 1), CONFIG["web"]["intraday_max_days"])
+    try:
+        data = await analyzer.get_intraday_indicators(secid.upper(), interval, days)
+    except AnalyticsUnavailable as e:
+        return unavailable_response(e)
     return json_response(data)
 
 
 @app.route('/api/security/<secid>/dividends')
 async def api_dividends_handler(secid):
     try:
-        async with MOEXClient(cache_manager=analyzer.cache) as client:
-            return json_response(await client.get_dividends(secid.upper()))
+        return json_response(await analyzer.moex.get_dividends(secid.upper()))
     except Exception as e:
         logger.error(f"Error getting dividends: {e}")
         return json_response({'error': str(e)}, status=500)
@@ -326,8 +508,7 @@ async def api_dividends_handler(secid):
 @app.route('/api/security/<secid>/coupons')
 async def api_coupons_handler(secid):
     try:
-        async with MOEXClient(cache_manager=analyzer.cache) as client:
-            return json_response(await client.get_coupons(secid.upper()))
+        return json_response(await analyzer.moex.get_coupons(secid.upper()))
     except Exception as e:
         logger.error(f"Error getting coupons: {e}")
         return json_response({'error': str(e)}, status=500)
@@ -336,13 +517,12 @@ async def api_coupons_handler(secid):
 @app.route('/api/security/<secid>/yields')
 async def api_yields_handler(secid):
     try:
-        async with MOEXClient(cache_manager=analyzer.cache) as client:
-            yields = await client.get_yields(
-                secid.upper(),
-                from_date=request.args.get('from'),
-                till_date=request.args.get('till'),
-            )
-            return json_response(yields)
+        yields = await analyzer.moex.get_yields(
+            secid.upper(),
+            from_date=request.args.get('from'),
+            till_date=request.args.get('till'),
+        )
+        return json_response(yields)
     except Exception as e:
         logger.error(f"Error getting yields: {e}")
         return json_response({'error': str(e)}, status=500)
@@ -351,8 +531,7 @@ async def api_yields_handler(secid):
 @app.route('/api/security/<secid>/specification')
 async def api_specification_handler(secid):
     try:
-        async with MOEXClient(cache_manager=analyzer.cache) as client:
-            return json_response(await client.get_security_specification(secid.upper()))
+        return json_response(await analyzer.moex.get_security_specification(secid.upper()))
     except Exception as e:
         logger.error(f"Error getting specification: {e}")
         return json_response({'error': str(e)}, status=500)
@@ -361,16 +540,15 @@ async def api_specification_handler(secid):
 @app.route('/api/security/<secid>/history/sessions')
 async def api_history_sessions_handler(secid):
     try:
-        async with MOEXClient(cache_manager=analyzer.cache) as client:
-            history = await client.get_history_by_sessions(
-                secid.upper(),
-                engine=request.args.get('engine', 'stock'),
-                market=request.args.get('market', 'shares'),
-                board=request.args.get('board', 'TQBR'),
-                from_date=request.args.get('from'),
-                till_date=request.args.get('till'),
-            )
-            return json_response(history)
+        history = await analyzer.moex.get_history_by_sessions(
+            secid.upper(),
+            engine=request.args.get('engine', 'stock'),
+            market=request.args.get('market', 'shares'),
+            board=request.args.get('board', 'TQBR'),
+            from_date=request.args.get('from'),
+            till_date=request.args.get('till'),
+        )
+        return json_response(history)
     except Exception as e:
         logger.error(f"Error getting history: {e}")
         return json_response({'error': str(e)}, status=500)
@@ -379,12 +557,11 @@ async def api_history_sessions_handler(secid):
 @app.route('/api/news')
 async def api_news_handler():
     try:
-        async with MOEXClient(cache_manager=analyzer.cache) as client:
-            news = await client.get_news(
-                lang=request.args.get('lang', 'ru'),
-                limit=int(request.args.get('limit', 10)),
-            )
-            return json_response(news)
+        news = await analyzer.moex.get_news(
+            lang=request.args.get('lang', 'ru'),
+            limit=int(request.args.get('limit', 10)),
+        )
+        return json_response(news)
     except Exception as e:
         logger.error(f"Error getting news: {e}")
         return json_response({'error': str(e)}, status=500)
@@ -397,13 +574,12 @@ async def search_securities_handler():
         return json_response([])
 
     try:
-        async with MOEXClient(cache_manager=analyzer.cache) as client:
-            all_securities = await client.get_securities()
-            results = [
-                s for s in all_securities
-                if query in s.get('SECID', '').upper() or query in s.get('SECNAME', '').upper()
-            ][:20]
-            return json_response(results)
+        all_securities = await analyzer.moex.get_securities()
+        results = [
+            s for s in all_securities
+            if query in s.get('SECID', '').upper() or query in s.get('SECNAME', '').upper()
+        ][:20]
+        return json_response(results)
     except Exception as e:
         logger.error(f"Error searching securities: {e}")
         return json_response([])
@@ -411,11 +587,12 @@ async def search_securities_handler():
 
 @app.route('/api/portfolio/calculate', methods=['POST'])
 async def api_portfolio_calculate_handler():
-    """Calculate portfolio returns"""
+    """Calculate portfolio returns (?debug=1 adds per-line timings)"""
     try:
         data = await request.get_json()
         capital = float(data.get('capital', 0))
         securities = data.get('securities', [])  # List of {secid, weight, price}
+        debug = request.args.get('debug') == '1'
 
         if capital <= 0 or not securities:
             return json_response({'error': 'Invalid input'}, status=400)
@@ -425,39 +602,66 @@ async def api_portfolio_calculate_handler():
             return json_response({'error': 'Total weight must be > 0'}, status=400)
 
         portfolio_value = 0.0
-        total_predicted_yield = 0.0
-        has_forecast = False
-
+        lines = []
         for sec in securities:
             weight = sec.get('weight', 0) / total_weight
             price = sec.get('price', 0)
             allocation = capital * weight
             shares = allocation / price if price > 0 else 0
             portfolio_value += shares * price
+            if sec.get('secid') and price > 0:
+                lines.append((sec['secid'], weight, price))
+
+        # Forecasts already made today are reused; the rest are computed
+        # concurrently, at most web.portfolio_concurrency at a time
+        todays = await analyzer.db.get_predictions_made_today([secid for secid, _, _ in lines])
+        semaphore = asyncio.Semaphore(CONFIG["web"]["portfolio_concurrency"])
+
+        async def forecast_line(secid: str):
+            started = time.perf_counter()
+            source = 'today'
+            prices = [p['predicted_price'] for p in todays.get(secid, [])]
+            if not prices:
+                source = 'computed'
+                try:
+                    async with semaphore:
+                        sec_data = await analyzer.get_security_data(secid, days=120) or {}
+                    prices = [p.get('price') for p in sec_data.get('predictions') or []]
+                    if 'error' in sec_data:
+                        source = 'error'
+                except AnalyticsUnavailable:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error forecasting {secid}: {e}")
+                    source = 'error'
+            return prices, {'secid': secid, 'source': source,
+                            'ms': round((time.perf_counter() - started) * 1000, 1)}
+
+        results = await asyncio.gather(*(forecast_line(secid) for secid, _, _ in lines))
 
-            secid = sec.get('secid')
-            if not secid or price <= 0:
-                continue
-            try:
-                sec_data = await analyzer.get_security_data(secid, days=120)
-                predictions = (sec_data or {}).get('predictions') or []
-                if predictions:
-                    avg_prediction = sum(
-                        p.get('price', price) for p in predictions) / len(predictions)
-                    sec_yield = ((avg_prediction - price) / price) * 100
-                    total_predicted_yield += sec_yield * weight
-                    has_forecast = True
-            except Exception as e:
-                logger.error(f"Error forecasting {secid}: {e}")
-
-        return json_response({
+        total_predicted_yield = 0.0
+        has_forecast = False
+        for (secid, weight, price), (prices, _) in zip(lines, results):
+            prices = [p if p is not None else price for p in prices]
+            if prices:
+                avg_prediction = sum(prices) / len(prices)
+                sec_yield = ((avg_prediction - price) / price) * 100
+                total_predicted_yield += sec_yield * weight
+                has_forecast = True
+
+        response = {
             'capital': capital,
             'portfolio_value': round(portfolio_value, 2),
             'expected_yield': round(total_predicted_yield, 2) if has_forecast else 0.0,
             # 'forecast' = derived from model predictions; 'none' = no data, 0 is honest
             'yield_source': 'forecast' if has_forecast else 'none',
             'securities': securities
-        })
+        }
+        if debug:
+            response['timings'] = [timing for _, timing in results]
+        return json_response(response)
+    except AnalyticsUnavailable as e:
+        return unavailable_response(e)
     except Exception as e:
         logger.error(f"Error calculating portfolio: {e}")
         return json_response({'error': str(e)}, status=500)
@@ -595,6 +799,19 @@ async def api_report_export_handler(report_id):
     return resp
 
 
+@app.route('/api/stats')
+async def api_stats_handler():
+    """Runtime metrics of the web process"""
+    return json_response({
+        'db_pool': analyzer.db.pool_stats(),
+        'analytics': analyzer.analytics.stats(),
+        'forecast_memo': analyzer.ml_predictor.memo.stats(),
+        'intraday_cache': analyzer.db.intraday.stats(),
+        'iss_cache': analyzer.cache.stats(),
+        'iss_client': analyzer.moex.stats(),
+    })
+
+
 @app.route('/api/advisor/run', methods=['POST'])
 async def api_advisor_run_handler():
     """Manual trigger for the weekly pipeline (runs in celery worker)"""
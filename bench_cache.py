@@ -0,0 +1,107 @@
+"""
+Benchmark: ISS cache footprint and load time per storage format
+- files:   one indent=2 JSON file per key (the original layout)
+- sqlite:  one table, minified JSON payloads
+- compact: one table, encode_payload (msgpack if installed / JSON, zlib)
+Run: venv/bin/python bench_cache.py [securities] [days]
+"""
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import cache as cache_module
+from cache import CacheManager
+
+BASE_URL = "https://iss.moex.com/iss/engines/stock/markets/shares/boards/TQBR/securities"
+
+
+def iss_candles_response(secid_index: int, days: int):
+    """Same shape as ISS /candles.json: metadata + columns + data rows"""
+    start = datetime(2024, 1, 1)
+    price = 100.0 + secid_index
+    rows = []
+    for d in range(days):
+        begin = start + timedelta(days=d)
+        rows.append([round(price, 2), round(price * 1.01, 2), round(price * 1.02, 2),
+                     round(price * 0.99, 2), round(price * 1000 * (d + 1), 1), 1000 + d,
+                     begin.strftime("%Y-%m-%d 00:00:00"), begin.strftime("%Y-%m-%d 23:59:59")])
+        price *= 1.001
+    columns = ["open", "close", "high", "low", "value", "volume", "begin", "end"]
+    metadata = {c: {"type": "double"} for c in columns[:4]}
+    metadata.update({"value": {"type": "double"}, "volume": {"type": "double"},
+                     "begin": {"type": "datetime", "bytes": 19, "max_size": 0},
+                     "end": {"type": "datetime", "bytes": 19, "max_size": 0}})
+    return {"candles": {"metadata": metadata, "columns": columns, "data": rows}}
+
+
+def footprint(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.iterdir() if f.is_file())
+
+
+def fill(cache: CacheManager, responses):
+    for url, params, data in responses:
+        cache.set(url, data, params)
+
+
+def load_all(cache: CacheManager, responses) -> float:
+    keys = [cache._get_cache_key(url, params) for url, params, _ in responses]
+    started = time.perf_counter()
+    for key in keys:
+        cache.store.load(key)
+    return time.perf_counter() - started
+
+
+def run_case(name: str, backend: str, responses, encode=None):
+    with tempfile.TemporaryDirectory() as tmp:
+        original = cache_module.encode_payload
+        if encode:
+            cache_module.encode_payload = encode
+        try:
+            cache = CacheManager(cache_dir=tmp, backend=backend)
+            started = time.perf_counter()
+            fill(cache, responses)
+            write = time.perf_counter() - started
+        finally:
+            cache_module.encode_payload = original
+        if backend == "sqlite":
+            cache.store._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        size = footprint(Path(tmp))
+        read = load_all(CacheManager(cache_dir=tmp, backend=backend), responses)
+    print(f"{name:<8} {size / 1e6:8.2f} MB  write {write:6.2f}s  load {read:6.2f}s "
+          f"({len(responses) / read:8.0f} entries/s)")
+    return size, read
+
+
+def run_migration(responses):
+    with tempfile.TemporaryDirectory() as tmp:
+        fill(CacheManager(cache_dir=tmp, backend="files"), responses)
+        cache = CacheManager(cache_dir=tmp, backend="sqlite")
+        started = time.perf_counter()
+        cache.migrate()
+        elapsed = time.perf_counter() - started
+        left = len(list(Path(tmp).glob("*.json")))
+    print(f"migrate  {len(responses)} files in {elapsed:.2f}s, {left} left behind")
+
+
+def main(n_securities: int = 200, days: int = 250):
+    responses = [
+        (f"{BASE_URL}/SEC{s:03d}/candles.json", {"interval": 24, "from": "2024-01-01"},
+         iss_candles_response(s, days))
+        for s in range(n_securities)
+    ]
+    print(f"{n_securities} candle responses x {days} rows, msgpack={cache_module.MSGPACK_AVAILABLE}")
+    files_size, files_read = run_case("files", "files", responses)
+    run_case("sqlite", "sqlite", responses,
+             encode=lambda d: json.dumps(d, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    compact_size, compact_read = run_case("compact", "sqlite", responses)
+    print(f"compact vs files: x{files_size / compact_size:.1f} smaller, "
+          f"x{files_read / compact_read:.1f} load speed")
+    run_migration(responses)
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
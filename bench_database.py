@@ -0,0 +1,69 @@
+"""
+Benchmark: candle inserts, one execute per row vs a single executemany
+Run: venv/bin/python bench_database.py [securities] [days]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from database import Database
+
+
+def synthetic_candles(n_securities: int, days: int):
+    start = datetime(2024, 1, 1)
+    candles = []
+    for s in range(n_securities):
+        secid = f"SEC{s:03d}"
+        price = 100.0 + s
+        for d in range(days):
+            candles.append({
+                'secid': secid,
+                'open': price, 'close': price * 1.01,
+                'low': price * 0.99, 'high': price * 1.02,
+                'volume': 1000 + d,
+                'time': start + timedelta(days=d),
+            })
+    return candles
+
+
+async def insert_rowwise(db: Database, candles):
+    """The previous implementation: one awaited execute per candle"""
+    async with db._connect() as conn:
+        for candle in candles:
+            candle_time = candle['time']
+            if isinstance(candle_time, datetime):
+                candle_time = candle_time.isoformat()
+            await conn.execute("""
+                INSERT OR IGNORE INTO candles
+                (secid, candle_open, candle_close, candle_low, candle_high, candle_volume, candle_time)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (candle['secid'], candle['open'], candle['close'], candle['low'],
+                  candle['high'], candle['volume'], candle_time))
+        await conn.commit()
+
+
+async def run_case(name: str, insert, candles):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        await db.init_db()
+        started = time.perf_counter()
+        await insert(db, candles)
+        elapsed = time.perf_counter() - started
+        await db.close()
+    print(f"{name:<12} {len(candles):>8} rows  {elapsed:7.2f}s  {len(candles) / elapsed:>10.0f} rows/s")
+    return elapsed
+
+
+async def main(n_securities: int = 50, days: int = 400):
+    candles = synthetic_candles(n_securities, days)
+    before = await run_case("rowwise", insert_rowwise, candles)
+    after = await run_case("executemany", lambda db, c: db.insert_candles(c), candles)
+    print(f"speedup      x{before / after:.1f}")
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:3]]
+    asyncio.run(main(*args))
@@ -0,0 +1,99 @@
+"""
+Benchmark: ISS candles payload -> candles
+- legacy:   flatten (dict per row via index comprehension) + per-candle
+            fromisoformat with string surgery and .get() calls
+- records:  CandleArrays.from_iss + to_records (get_candles format)
+- columnar: CandleArrays.from_iss only (get_candles_arrays)
+Run: venv/bin/python bench_moex_parse.py [candles] [repeats]
+"""
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+
+from candles import CandleArrays
+from moex_api import MOEXClient
+
+
+def iss_payload(n: int) -> bytes:
+    start = datetime(2024, 1, 1, 10)
+    price = 100.0
+    rows = []
+    for i in range(n):
+        begin = start + timedelta(minutes=i)
+        rows.append([round(price, 2), round(price * 1.001, 2), round(price * 1.002, 2),
+                     round(price * 0.999, 2), round(price * 1000, 1), 1000 + i,
+                     begin.strftime("%Y-%m-%d %H:%M:%S"),
+                     (begin + timedelta(seconds=59)).strftime("%Y-%m-%d %H:%M:%S")])
+        price *= 1.0001
+    return json.dumps({"candles": {
+        "columns": ["open", "close", "high", "low", "value", "volume", "begin", "end"],
+        "data": rows}}).encode("utf-8")
+
+
+def legacy_flatten(data, blockname):
+    block = data[blockname]
+    columns = block['columns']
+    return [{columns[i]: row[i] for i in range(len(columns))} for row in block['data']]
+
+
+def legacy_parse(secid, candle):
+    try:
+        begin_str = candle.get('begin', '')
+        if begin_str:
+            begin_str = begin_str.replace('Z', '+00:00')
+            if '+' not in begin_str and 'T' in begin_str:
+                begin_str += '+00:00'
+            candle_time = datetime.fromisoformat(begin_str)
+        else:
+            candle_time = datetime.now()
+        return {
+            'secid': secid,
+            'open': float(candle.get('open', 0)) if candle.get('open') else 0.0,
+            'close': float(candle.get('close', 0)) if candle.get('close') else 0.0,
+            'low': float(candle.get('low', 0)) if candle.get('low') else 0.0,
+            'high': float(candle.get('high', 0)) if candle.get('high') else 0.0,
+            'volume': int(candle.get('volume', 0)) if candle.get('volume') else 0,
+            'time': candle_time
+        }
+    except Exception:
+        return None
+
+
+def legacy(data):
+    return [c for c in (legacy_parse("SBER", row) for row in legacy_flatten(data, "candles")) if c]
+
+
+def records(data):
+    return CandleArrays.from_iss(*MOEXClient.block(data, "candles")).to_records("SBER")
+
+
+def columnar(data):
+    return CandleArrays.from_iss(*MOEXClient.block(data, "candles"))
+
+
+def timed(fn, data, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn(data)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(n: int = 10_000, repeats: int = 5):
+    payload = iss_payload(n)
+    decode = timed(json.loads, payload, repeats)
+    data = json.loads(payload)
+    assert records(data) == legacy(data)
+    print(f"{n} candles, {len(payload) / 1e6:.2f} MB JSON, decode {decode * 1000:.1f} ms (best of {repeats})")
+    base = None
+    for name, fn in (("legacy", legacy), ("records", records), ("columnar", columnar)):
+        elapsed = timed(fn, data, repeats)
+        base = base or elapsed
+        print(f"{name:<9} {elapsed * 1000:8.2f} ms  {n / elapsed:10.0f} candles/s  x{base / elapsed:.1f}")
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
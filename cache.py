@@ -1,99 +1,397 @@
 """
-File-based caching system for API responses
+Caching system for API responses
+
+Two tiers: a size-bounded in-process LRU of already decoded objects (L1)
+in front of a persistent store (L2); the store is only touched on an L1
+miss. Cached objects are shared between callers and must be treated as
+read-only.
+
+Stores:
+- SQLiteCacheStore (default): one table in cache/cache.db, indexed by
+  expires_at, so expiry is a single DELETE
+- FileCacheStore: the original one {md5}.json file per key
+CACHE_BACKEND=files switches back to the file store.
+
+SQLite payloads are compact: a 2-byte header (serializer, compression)
+followed by msgpack (when installed) or minified JSON, zlib-compressed
+above COMPRESS_THRESHOLD bytes. migrate() moves old JSON files into the
+store once; bench_cache.py measures footprint and load time.
 """
 import json
 import os
+import time
+import zlib
+import sqlite3
 import hashlib
 import logging
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Dict, Any, Tuple
 from pathlib import Path
 
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+# Entries written without an explicit TTL are kept this long (the old
+# clear_expired removed files older than 30 days)
+DEFAULT_RETENTION_HOURS = 30 * 24
+
+# (cached_at epoch, expires_at epoch, data, stored size in bytes)
+Entry = Tuple[float, float, Any, int]
+
+# Payloads smaller than this are not worth a zlib frame
+COMPRESS_THRESHOLD = 1024
+
+# Seconds a cache write waits for the SQLite lock held by another process
+# (the celery worker shares the file) before it is skipped. The store is
+# called on the event loop, so this bounds how long a request can stall.
+BUSY_TIMEOUT = 0.25
+
+
+def encode_payload(data: Any, compress_threshold: int = COMPRESS_THRESHOLD) -> bytes:
+    """data -> header + body; header = serializer (j/m) + compression (-/z)"""
+    if MSGPACK_AVAILABLE:
+        serializer, body = b'm', msgpack.packb(data, use_bin_type=True)
+    else:
+        serializer = b'j'
+        body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if len(body) >= compress_threshold:
+        return serializer + b'z' + zlib.compress(body, 6)
+    return serializer + b'-' + body
+
+
+def decode_payload(payload: bytes) -> Any:
+    """Inverse of encode_payload; headerless payloads are plain JSON"""
+    serializer = payload[:1]
+    if serializer not in (b'j', b'm'):
+        return json.loads(payload)
+    body = payload[2:]
+    if payload[1:2] == b'z':
+        body = zlib.decompress(body)
+    if serializer == b'm':
+        if not MSGPACK_AVAILABLE:
+            raise RuntimeError("msgpack-encoded cache entry but msgpack is not installed")
+        return msgpack.unpackb(body, raw=False)
+    return json.loads(body)
+
+
+class FileCacheStore:
+    """One pretty-printed JSON file per key"""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+        self.logger = logging.getLogger("cache")
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    @staticmethod
+    def lifetime(data: Dict) -> Tuple[float, float]:
+        """(cached_at, expires_at) of a decoded cache file"""
+        cached_at = datetime.fromisoformat(data.get('cached_at', '2000-01-01')).timestamp()
+        return cached_at, data.get('expires_at') or cached_at + DEFAULT_RETENTION_HOURS * 3600
+
+    def load(self, key: str) -> Optional[Entry]:
+        cache_path = self._path(key)
+        if not cache_path.exists():
+            return None
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            raw = f.read()
+        data = json.loads(raw)
+        return (*self.lifetime(data), data.get('data'), len(raw))
+
+    def save(self, key: str, url: str, params: Optional[Dict], data: Any,
+             cached_at: float, expires_at: float) -> int:
+        raw = json.dumps({
+            'cached_at': datetime.fromtimestamp(cached_at).isoformat(),
+            'expires_at': expires_at,
+            'url': url,
+            'params': params,
+            'data': data
+        }, ensure_ascii=False, indent=2)
+        with open(self._path(key), 'w', encoding='utf-8') as f:
+            f.write(raw)
+        return len(raw)
+
+    def delete(self, key: str):
+        self._path(key).unlink(missing_ok=True)
+
+    def purge_expired(self, now: float) -> int:
+        removed = 0
+        for cache_file in self.cache_dir.glob("*.json"):
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if self.lifetime(data)[1] < now:
+                    cache_file.unlink()
+                    removed += 1
+            except:
+                # If can't read, delete
+                cache_file.unlink()
+                removed += 1
+        return removed
+
+    def clear(self):
+        for cache_file in self.cache_dir.glob("*.json"):
+            cache_file.unlink()
+
+
+class SQLiteCacheStore:
+    """All entries in one SQLite table: indexed lookups, one-statement expiry"""
+
+    # PRAGMA user_version once headerless rows have been re-encoded
+    COMPACT_VERSION = 1
+
+    def __init__(self, path: Path, busy_timeout: float = BUSY_TIMEOUT):
+        self.path = path
+        self.logger = logging.getLogger("cache")
+        # Shared by the web and worker processes: WAL readers never wait
+        # for the writer; a write that cannot get the lock within
+        # busy_timeout raises and is skipped (see CacheManager.set)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=busy_timeout)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                cached_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                payload BLOB NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires_at ON cache(expires_at)")
+        self._conn.commit()
+
+    def load(self, key: str) -> Optional[Entry]:
+        row = self._conn.execute(
+            "SELECT cached_at, expires_at, payload, size FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        cached_at, expires_at, payload, size = row
+        return cached_at, expires_at, decode_payload(payload), size
+
+    def save(self, key: str, url: str, params: Optional[Dict], data: Any,
+             cached_at: float, expires_at: float) -> int:
+        payload = encode_payload(data)
+        self._conn.execute("""
+            INSERT OR REPLACE INTO cache (key, url, cached_at, expires_at, size, payload)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (key, url, cached_at, expires_at, len(payload), payload))
+        self._conn.commit()
+        return len(payload)
+
+    def delete(self, key: str):
+        self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+        self._conn.commit()
+
+    def purge_expired(self, now: float) -> int:
+        removed = self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (now,)).rowcount
+        self._conn.commit()
+        return removed
+
+    def clear(self):
+        self._conn.execute("DELETE FROM cache")
+        self._conn.commit()
+
+    def migrate(self, cache_dir: Path) -> int:
+        """Import of FileCacheStore files (then deleted) and a one-shot
+        re-encoding of headerless rows, recorded in PRAGMA user_version so
+        later start-ups skip the table scan; returns the number of entries
+        moved"""
+        moved = 0
+        for cache_file in cache_dir.glob("*.json"):
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                cached_at, expires_at = FileCacheStore.lifetime(data)
+                payload = encode_payload(data.get('data'))
+                self._conn.execute("""
+                    INSERT OR IGNORE INTO cache (key, url, cached_at, expires_at, size, payload)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (cache_file.stem, data.get('url'), cached_at, expires_at, len(payload), payload))
+                moved += 1
+            except Exception as e:
+                self.logger.error(f"Cannot migrate cache file {cache_file.name}: {e}")
+            cache_file.unlink()
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < self.COMPACT_VERSION:
+            legacy = self._conn.execute(
+                "SELECT key, payload FROM cache WHERE substr(payload, 1, 1) NOT IN (X'6A', X'6D')").fetchall()
+            for key, payload in legacy:
+                compact = encode_payload(json.loads(payload))
+                self._conn.execute("UPDATE cache SET payload = ?, size = ? WHERE key = ?",
+                                   (compact, len(compact), key))
+                moved += 1
+            self._conn.execute(f"PRAGMA user_version = {self.COMPACT_VERSION}")
+        self._conn.commit()
+        return moved
+
+    def close(self):
+        self._conn.close()
+
 
 class CacheManager:
-    """File-based cache manager"""
-    
-    def __init__(self, cache_dir: str = "cache"):
+    """Two-tier cache manager: memory LRU over a file or SQLite store"""
+
+    def __init__(self, cache_dir: str = "cache", memory_entries: int = 1024,
+                 memory_bytes: int = 64 * 1024 * 1024, backend: str = None):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
         self.logger = logging.getLogger("cache")
-    
+        backend = backend or os.getenv("CACHE_BACKEND", "sqlite")
+        if backend == "files":
+            self.store = FileCacheStore(self.cache_dir)
+        else:
+            self.store = SQLiteCacheStore(self.cache_dir / "cache.db")
+        # L1: key -> (cached_at, expires_at, data, stored size)
+        self.memory_entries = memory_entries
+        self.memory_bytes = memory_bytes
+        self._memory: "OrderedDict[str, Entry]" = OrderedDict()
+        self._memory_size = 0
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'stale_hits': 0, 'misses': 0, 'evictions': 0,
+                       'busy_skips': 0}
+
     def _get_cache_key(self, url: str, params: Dict = None) -> str:
         """Generate cache key from URL and params"""
         key_string = url
         if params:
             key_string += json.dumps(params, sort_keys=True)
         return hashlib.md5(key_string.encode()).hexdigest()
-    
-    def _get_cache_path(self, key: str) -> Path:
-        """Get cache file path"""
-        return self.cache_dir / f"{key}.json"
-    
+
     def get(self, url: str, params: Dict = None, ttl_hours: int = 24) -> Optional[Dict]:
         """Get cached data if exists and not expired"""
+        hit = self.get_entry(url, params, ttl_hours=ttl_hours)
+        return hit[0] if hit else None
+
+    def get_entry(self, url: str, params: Dict = None, ttl_hours: float = 24,
+                  stale_hours: float = 0) -> Optional[Tuple[Any, bool]]:
+        """(data, is_stale) or None. Entries older than ttl_hours are still
+        returned, flagged stale, for another stale_hours (stale-while-revalidate)"""
         key = self._get_cache_key(url, params)
-        cache_path = self._get_cache_path(key)
-        
-        if not cache_path.exists():
-            return None
-        
+        now = time.time()
+        fresh_age = ttl_hours * 3600
+        max_age = (ttl_hours + stale_hours) * 3600
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            if now - entry[0] <= max_age and now < entry[1]:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return self._flag(entry, now, fresh_age)
+            # Expired in L1: the stored copy is at least as old, fall through
+            self._forget(key)
+
         try:
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
+            entry = self.store.load(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+
             # Check expiration
-            cached_time = datetime.fromisoformat(data.get('cached_at', '2000-01-01'))
-            if datetime.now() - cached_time > timedelta(hours=ttl_hours):
+            if now - entry[0] > max_age or now >= entry[1]:
                 # Expired, delete cache
-                cache_path.unlink()
+                self.store.delete(key)
+                self._stats['misses'] += 1
                 return None
-            
-            return data.get('data')
+
+            self._stats['disk_hits'] += 1
+            self._remember(key, entry)
+            return self._flag(entry, now, fresh_age)
+        except sqlite3.OperationalError as e:
+            if not self._busy(e):
+                self.logger.error(f"Error reading cache: {e}")
+            self._stats['misses'] += 1
+            return None
         except Exception as e:
             self.logger.error(f"Error reading cache: {e}")
+            self._stats['misses'] += 1
             return None
-    
-    def set(self, url: str, data: Any, params: Dict = None):
-        """Cache data"""
+
+    def _flag(self, entry: Entry, now: float, fresh_age: float) -> Tuple[Any, bool]:
+        stale = now - entry[0] > fresh_age
+        if stale:
+            self._stats['stale_hits'] += 1
+        return entry[2], stale
+
+    def set(self, url: str, data: Any, params: Dict = None, ttl_hours: float = None):
+        """Cache data; the entry is purged after ttl_hours (default 30 days)"""
         key = self._get_cache_key(url, params)
-        cache_path = self._get_cache_path(key)
-        
+
         try:
-            cache_data = {
-                'cached_at': datetime.now().isoformat(),
-                'url': url,
-                'params': params,
-                'data': data
-            }
-            
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
+            cached_at = time.time()
+            expires_at = cached_at + (ttl_hours or DEFAULT_RETENTION_HOURS) * 3600
+            size = self.store.save(key, url, params, data, cached_at, expires_at)
+            self._remember(key, (cached_at, expires_at, data, size))
+        except sqlite3.OperationalError as e:
+            if not self._busy(e):
+                self.logger.error(f"Error writing cache: {e}")
         except Exception as e:
             self.logger.error(f"Error writing cache: {e}")
-    
+
+    def _busy(self, error: sqlite3.OperationalError) -> bool:
+        """Another process holds the write lock: count it and move on, the
+        entry is just not cached this time"""
+        if 'locked' not in str(error) and 'busy' not in str(error):
+            return False
+        self._stats['busy_skips'] += 1
+        self.logger.debug(f"Cache store busy, skipped: {error}")
+        return True
+
+    def _remember(self, key: str, entry: Entry):
+        """Put a decoded object into L1, evicting LRU entries over budget"""
+        self._forget(key)
+        if entry[3] > self.memory_bytes:
+            return
+        self._memory[key] = entry
+        self._memory_size += entry[3]
+        while len(self._memory) > self.memory_entries or self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= evicted[3]
+            self._stats['evictions'] += 1
+
+    def _forget(self, key: str):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_size -= entry[3]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit counters and hit ratio per tier"""
+        lookups = self._stats['memory_hits'] + self._stats['disk_hits'] + self._stats['misses']
+        disk_lookups = lookups - self._stats['memory_hits']
+        return {
+            **self._stats,
+            'backend': type(self.store).__name__,
+            'memory_entries': len(self._memory),
+            'memory_bytes': self._memory_size,
+            'memory_hit_ratio': round(self._stats['memory_hits'] / lookups, 4) if lookups else 0.0,
+            'disk_hit_ratio': round(self._stats['disk_hits'] / disk_lookups, 4) if disk_lookups else 0.0,
+        }
+
     def clear_expired(self):
-        """Clear all expired cache files"""
+        """Clear all expired cache entries"""
         if not self.cache_dir.exists():
             return
-        
-        for cache_file in self.cache_dir.glob("*.json"):
-            try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                cached_time = datetime.fromisoformat(data.get('cached_at', '2000-01-01'))
-                # Remove if older than 30 days
-                if datetime.now() - cached_time > timedelta(days=30):
-                    cache_file.unlink()
-            except:
-                # If can't read, delete
-                cache_file.unlink()
-    
+
+        removed = self.store.purge_expired(time.time())
+        if removed:
+            self.logger.info(f"Removed {removed} expired cache entries")
+
+    def migrate(self):
+        """Move an old file cache into the SQLite store (no-op otherwise)"""
+        if isinstance(self.store, SQLiteCacheStore):
+            moved = self.store.migrate(self.cache_dir)
+            if moved:
+                self.logger.info(f"Migrated {moved} cache entries to the compact SQLite store")
+
     def clear_all(self):
         """Clear all cache"""
         if not self.cache_dir.exists():
             return
-        
-        for cache_file in self.cache_dir.glob("*.json"):
-            cache_file.unlink()
 
+        self._memory.clear()
+        self._memory_size = 0
+        self.store.clear()
@@ -0,0 +1,255 @@
+"""
+Columnar OHLCV container shared by the database, indicators and models.
+
+Analytics only ever need whole columns, so candles are kept as contiguous
+float64 arrays (plus int64 epoch seconds) instead of a dict per row.
+Naive timestamps are treated as UTC, the same way SQLite's strftime('%s')
+treats the stored candle_time strings. Intraday timeframes are built
+from stored 1-minute bars with resample().
+"""
+import calendar
+import warnings
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+
+def to_epoch(value) -> int:
+    """datetime / ISO string -> epoch seconds (naive = UTC)"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return calendar.timegm(value.utctimetuple())
+
+
+def from_epoch(seconds: int) -> datetime:
+    """epoch seconds -> naive datetime (inverse of to_epoch)"""
+    return datetime.fromtimestamp(int(seconds), tz=timezone.utc).replace(tzinfo=None)
+
+
+def _epoch_or_nat(value) -> np.datetime64:
+    try:
+        return np.datetime64(to_epoch(value), 's')
+    except (TypeError, ValueError, AttributeError):
+        return np.datetime64('NaT')
+
+
+def parse_times(values: Sequence[Any]) -> np.ndarray:
+    """ISS timestamps ('YYYY-MM-DD hh:mm:ss') -> datetime64[s] in one
+    NumPy call; NaT where missing. Values NumPy cannot parse (offsets,
+    garbage) send the whole column through to_epoch instead."""
+    try:
+        with warnings.catch_warnings():
+            # NumPy only warns about offsets; treat them as unparsable
+            warnings.simplefilter("error")
+            return np.array(values, dtype='datetime64[s]')
+    except (TypeError, ValueError, UserWarning, DeprecationWarning):
+        return np.array([_epoch_or_nat(v) for v in values], dtype='datetime64[s]')
+
+
+class CandleArrays:
+    """OHLCV series as parallel arrays, ascending by time"""
+
+    FIELDS = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, time: np.ndarray, open: np.ndarray, high: np.ndarray,
+                 low: np.ndarray, close: np.ndarray, volume: np.ndarray):
+        self.time = np.ascontiguousarray(time, dtype=np.int64)
+        self.open = np.ascontiguousarray(open, dtype=np.float64)
+        self.high = np.ascontiguousarray(high, dtype=np.float64)
+        self.low = np.ascontiguousarray(low, dtype=np.float64)
+        self.close = np.ascontiguousarray(close, dtype=np.float64)
+        self.volume = np.ascontiguousarray(volume, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def __repr__(self) -> str:
+        return f"CandleArrays(n={len(self)})"
+
+    @classmethod
+    def empty(cls) -> "CandleArrays":
+        return cls.from_rows([])
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[Any]]) -> "CandleArrays":
+        """Rows of (epoch, open, high, low, close, volume), e.g. straight
+        from a cursor — one 2-D allocation, then a copy per column."""
+        block = np.array(rows, dtype=np.float64).reshape(-1, len(cls.FIELDS))
+        return cls(*(block[:, i] for i in range(len(cls.FIELDS))))
+
+    @classmethod
+    def from_iss(cls, columns: Sequence[str], data: Sequence[Sequence[Any]]) -> "CandleArrays":
+        """
+        From an ISS candles block: the rows are transposed once, `begin`
+        is parsed in bulk and every price column becomes one float64
+        array. Rows without a usable `begin` are dropped; missing prices
+        and volumes become 0, as the old per-candle parser did.
+        """
+        if not data:
+            return cls.empty()
+        block = dict(zip(columns, zip(*data)))
+        stamps = parse_times(block['begin'])
+        valid = ~np.isnat(stamps)
+
+        def numeric(name: str) -> np.ndarray:
+            values = np.array(block.get(name, (0,) * len(data)), dtype=np.float64)
+            return np.nan_to_num(values[valid], nan=0.0)
+
+        return cls(stamps[valid].astype(np.int64), numeric('open'), numeric('high'),
+                   numeric('low'), numeric('close'), np.trunc(numeric('volume')))
+
+    @classmethod
+    def concat(cls, parts: Sequence["CandleArrays"]) -> "CandleArrays":
+        if not parts:
+            return cls.empty()
+        return cls(*(np.concatenate([getattr(p, f) for p in parts]) for f in cls.FIELDS))
+
+    @classmethod
+    def from_records(cls, candles: Iterable[Dict[str, Any]]) -> "CandleArrays":
+        """From the dict format of MOEXClient.get_candles / Database.get_candles"""
+        return cls.from_rows([
+            (to_epoch(c['time']), c['open'], c['high'], c['low'], c['close'], c['volume'])
+            for c in candles
+        ])
+
+    def tail(self, n: int) -> "CandleArrays":
+        return CandleArrays(*(getattr(self, f)[-n:] for f in self.FIELDS))
+
+    def starting(self, epoch: int) -> "CandleArrays":
+        """Bars at or after `epoch`"""
+        i = int(np.searchsorted(self.time, epoch, side='left'))
+        return CandleArrays(*(getattr(self, f)[i:] for f in self.FIELDS))
+
+    def before(self, epoch: int) -> "CandleArrays":
+        """Bars strictly before `epoch`"""
+        i = int(np.searchsorted(self.time, epoch, side='left'))
+        return CandleArrays(*(getattr(self, f)[:i] for f in self.FIELDS))
+
+    def datetimes(self) -> List[datetime]:
+        """Naive datetimes of the time column, converted in bulk"""
+        return self.time.astype('datetime64[s]').tolist()
+
+    def time_strings(self) -> List[str]:
+        """ISO strings as stored in candles.candle_time (datetime.isoformat)"""
+        return np.datetime_as_string(self.time.astype('datetime64[s]')).tolist()
+
+    def to_records(self, secid: str) -> List[Dict[str, Any]]:
+        """Back to the dict-per-candle format (JSON responses, inserts)"""
+        return [
+            {
+                'secid': secid,
+                'open': o,
+                'close': c,
+                'low': lo,
+                'high': h,
+                'volume': v,
+                'time': t,
+            }
+            for t, o, h, lo, c, v in zip(self.datetimes(), self.open.tolist(),
+                                          self.high.tolist(), self.low.tolist(),
+                                          self.close.tolist(),
+                                          self.volume.astype(np.int64).tolist())
+        ]
+
+
+# ISS candle interval codes served from stored 1-minute bars -> bar minutes
+INTERVAL_MINUTES = {1: 1, 10: 10, 60: 60, 24: 1440}
+
+
+def resample(candles: CandleArrays, minutes: int) -> CandleArrays:
+    """
+    Aggregate ascending bars into clock-aligned `minutes`-long bars (1440:
+    calendar days of the naive exchange time): first open, max high, min
+    low, last close, summed volume. Bucket edges are found with one diff,
+    then every column is reduced with ufunc.reduceat.
+    """
+    if minutes <= 1 or not len(candles):
+        return candles
+    width = minutes * 60
+    bucket = candles.time // width * width
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(candles)] - 1
+    return CandleArrays(
+        bucket[starts],
+        candles.open[starts],
+        np.maximum.reduceat(candles.high, starts),
+        np.minimum.reduceat(candles.low, starts),
+        candles.close[ends],
+        np.add.reduceat(candles.volume, starts),
+    )
+
+
+class IntradayCache:
+    """
+    Per-security window of 1-minute bars plus its resamples, LRU by
+    security. The database tops a window up with the rows stored after
+    its newest bar and re-reads from the oldest bar it rewrote
+    (mark_dirty), so a replaced partial bar never leaves a stale resample
+    behind and a hit costs one small range scan instead of the window.
+    """
+
+    def __init__(self, max_securities: int = 64):
+        self.max_securities = max_securities
+        # secid -> {'since', 'minutes', 'resampled': {interval: bars},
+        #           'dirty_from', 'version' (bumped by every mark_dirty)}
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def covers(self, secid: str, since: int) -> bool:
+        entry = self._entries.get(secid)
+        return entry is not None and entry['since'] <= since
+
+    def refresh_from(self, secid: str) -> Tuple[int, int]:
+        """(epoch to re-read stored rows from, version): the oldest rewritten
+        bar, or just after the newest cached one"""
+        entry = self._entries[secid]
+        minutes = entry['minutes']
+        newest = int(minutes.time[-1]) + 1 if len(minutes) else entry['since']
+        dirty = entry['dirty_from']
+        return (newest if dirty is None else min(dirty, newest)), entry['version']
+
+    def put(self, secid: str, since: int, minutes: CandleArrays):
+        self._entries[secid] = {'since': since, 'minutes': minutes, 'resampled': {},
+                                'dirty_from': None, 'version': 0}
+        self._entries.move_to_end(secid)
+        while len(self._entries) > self.max_securities:
+            self._entries.popitem(last=False)
+
+    def update(self, secid: str, from_time: int, rows: CandleArrays, version: int):
+        """Replace the cached bars from `from_time` on with `rows`, read
+        at `version` (a write marked dirty meanwhile keeps its mark)"""
+        entry = self._entries[secid]
+        if entry['version'] == version:
+            entry['dirty_from'] = None
+        self._entries.move_to_end(secid)
+        if not len(rows) and (not len(entry['minutes']) or entry['minutes'].time[-1] < from_time):
+            return
+        entry['minutes'] = CandleArrays.concat([entry['minutes'].before(from_time), rows])
+        entry['resampled'] = {}
+
+    def mark_dirty(self, secid: str, from_time: int):
+        entry = self._entries.get(secid)
+        if entry is not None:
+            dirty = entry['dirty_from']
+            entry['dirty_from'] = from_time if dirty is None else min(dirty, from_time)
+            entry['version'] += 1
+
+    def window(self, secid: str, since: int, interval: int) -> CandleArrays:
+        """Bars of an interval code from `since` on. `since` is midnight, so
+        every bucket of the cached resample starting there is complete."""
+        entry = self._entries[secid]
+        if interval == 1:
+            return entry['minutes'].starting(since)
+        bars = entry['resampled'].get(interval)
+        if bars is None:
+            self.misses += 1
+            bars = entry['resampled'][interval] = resample(entry['minutes'], INTERVAL_MINUTES[interval])
+        else:
+            self.hits += 1
+        return bars.starting(since)
+
+    def stats(self) -> Dict[str, int]:
+        return {'securities': len(self._entries), 'hits': self.hits, 'misses': self.misses}
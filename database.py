@@ -2,6 +2,8 @@
 SQLite Database Accessor
 """
 import os
+import time
+import asyncio
 import aiosqlite
 import logging
 from contextlib import asynccontextmanager
@@ -9,27 +11,161 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime
 import json
 import hashlib
+from itertools import groupby, repeat
 
+import numpy as np
 
-class Database:
-    """SQLite database accessor"""
+from candles import INTERVAL_MINUTES, CandleArrays, IntradayCache, to_epoch
 
-    def __init__(self, db_path: str = None):
-        self.db_path = db_path or os.getenv("DB_PATH", "moex_data.db")
-        self.logger = logging.getLogger("database")
+# Bound on "IN (?, ?, ...)" lists: old SQLite builds allow 999 variables
+MAX_SQL_VARIABLES = 900
 
-    @asynccontextmanager
-    async def _connect(self):
+
+def chunked(items: List[Any], size: int = MAX_SQL_VARIABLES):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class ConnectionPool:
+    """Long-lived aiosqlite connections for one event loop: a single writer
+    (SQLite serializes writers anyway) and up to `readers` reader
+    connections, opened lazily. PRAGMAs are applied once per connection.
+
+    asyncio primitives are bound to the loop they run on, so the pool is
+    too; Database swaps it when the loop changes (celery runs every task
+    in a fresh asyncio.run)."""
+
+    def __init__(self, db_path: str, readers: int = 4):
+        self.db_path = db_path
+        self.size = max(1, readers)
+        self.loop = asyncio.get_running_loop()
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._writer_lock = asyncio.Lock()
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._readers = []
+        self._opening = 0
+        self._metrics = {
+            'writer_checkouts': 0,
+            'reader_checkouts': 0,
+            'wait_total_ms': 0.0,
+            'wait_max_ms': 0.0,
+        }
+
+    async def _open(self, read_only: bool = False) -> aiosqlite.Connection:
         """Connection with pragmas required for safe multi-process access
         (quart web app + celery worker share the same file)."""
         db = await aiosqlite.connect(self.db_path)
+        await db.execute("PRAGMA journal_mode=WAL")
+        await db.execute("PRAGMA busy_timeout=5000")
+        await db.execute("PRAGMA synchronous=NORMAL")
+        if read_only:
+            await db.execute("PRAGMA query_only=ON")
+        return db
+
+    def _record_wait(self, kind: str, started: float):
+        waited = (time.perf_counter() - started) * 1000
+        self._metrics[f'{kind}_checkouts'] += 1
+        self._metrics['wait_total_ms'] += waited
+        self._metrics['wait_max_ms'] = max(self._metrics['wait_max_ms'], waited)
+
+    @asynccontextmanager
+    async def writer(self):
+        started = time.perf_counter()
+        async with self._writer_lock:
+            self._record_wait('writer', started)
+            if self._writer is None:
+                self._writer = await self._open()
+            db = self._writer
+            try:
+                yield db
+            finally:
+                # Never hand an open transaction to the next caller
+                if db.in_transaction:
+                    await db.rollback()
+                db.row_factory = None
+
+    @asynccontextmanager
+    async def reader(self):
+        started = time.perf_counter()
+        if self._idle.empty() and len(self._readers) + self._opening < self.size:
+            self._opening += 1  # reserve the slot before awaiting
+            try:
+                db = await self._open(read_only=True)
+            finally:
+                self._opening -= 1
+            self._readers.append(db)
+        else:
+            db = await self._idle.get()
+        self._record_wait('reader', started)
         try:
-            await db.execute("PRAGMA journal_mode=WAL")
-            await db.execute("PRAGMA busy_timeout=5000")
-            await db.execute("PRAGMA synchronous=NORMAL")
             yield db
         finally:
+            db.row_factory = None
+            self._idle.put_nowait(db)
+
+    def stats(self) -> Dict[str, Any]:
+        checkouts = self._metrics['writer_checkouts'] + self._metrics['reader_checkouts']
+        return {
+            **self._metrics,
+            'wait_total_ms': round(self._metrics['wait_total_ms'], 2),
+            'wait_max_ms': round(self._metrics['wait_max_ms'], 2),
+            'wait_avg_ms': round(self._metrics['wait_total_ms'] / checkouts, 3) if checkouts else 0.0,
+            'readers_open': len(self._readers),
+            'readers_idle': self._idle.qsize(),
+            'readers_max': self.size,
+        }
+
+    def _connections(self) -> List[aiosqlite.Connection]:
+        return [db for db in [self._writer, *self._readers] if db is not None]
+
+    async def close(self):
+        for db in self._connections():
             await db.close()
+        self._writer = None
+        self._readers = []
+
+    def abandon(self):
+        """Stop the worker threads of a pool whose event loop is gone"""
+        for db in self._connections():
+            db.stop()
+        self._writer = None
+        self._readers = []
+
+
+class Database:
+    """SQLite database accessor"""
+
+    def __init__(self, db_path: str = None, readers: int = None):
+        self.db_path = db_path or os.getenv("DB_PATH", "moex_data.db")
+        self.readers = readers or int(os.getenv("DB_POOL_READERS", "4"))
+        self.logger = logging.getLogger("database")
+        self._pool: Optional[ConnectionPool] = None
+        # Cached candles_1m windows and their resamples (get_candles_interval)
+        self.intraday = IntradayCache()
+
+    def _get_pool(self) -> ConnectionPool:
+        loop = asyncio.get_running_loop()
+        if self._pool is None or self._pool.loop is not loop:
+            if self._pool is not None:
+                self._pool.abandon()
+            self._pool = ConnectionPool(self.db_path, readers=self.readers)
+        return self._pool
+
+    def _connect(self):
+        """Writer connection from the pool (exclusive while checked out)"""
+        return self._get_pool().writer()
+
+    def _read(self):
+        """Read-only connection from the pool"""
+        return self._get_pool().reader()
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    def pool_stats(self) -> Dict[str, Any]:
+        return self._pool.stats() if self._pool else {}
 
     async def init_db(self):
         """Initialize database tables"""
@@ -49,6 +185,37 @@ class Database:
                 )
             """)
 
+            # Intraday store: 1-minute bars only (10m/60m/24h reads are
+            # resampled from them, see get_candles_interval). Kept apart from
+            # the daily candles table, whose UNIQUE(secid, candle_time) would
+            # collide; times are epoch seconds of the naive exchange time.
+            # The (secid, candle_time) primary key is the range-scan index.
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS candles_1m (
+                    secid TEXT NOT NULL,
+                    candle_time INTEGER NOT NULL,
+                    candle_open REAL NOT NULL,
+                    candle_close REAL NOT NULL,
+                    candle_low REAL NOT NULL,
+                    candle_high REAL NOT NULL,
+                    candle_volume INTEGER NOT NULL,
+                    PRIMARY KEY (secid, candle_time)
+                ) WITHOUT ROWID
+            """)
+
+            # Backfill log: board trading days whose history-by-date pages
+            # were all stored in candles (rows = candles written, 0 for a
+            # day without trades), so a backfill resumes where it stopped
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS backfill_log (
+                    board TEXT NOT NULL,
+                    trade_date TEXT NOT NULL,
+                    rows INTEGER NOT NULL,
+                    completed_at TIMESTAMP NOT NULL,
+                    PRIMARY KEY (board, trade_date)
+                )
+            """)
+
             # Securities table
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS securities (
@@ -110,6 +277,23 @@ class Database:
                 )
             """)
 
+            # Forecast memo's DB tier, keyed like ForecastMemo: the same
+            # prediction dates from a 60- and a 120-day window are two rows
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS forecast_memo (
+                    secid TEXT NOT NULL,
+                    source_start_time INTEGER NOT NULL,    -- oldest input candle
+                    source_candle_time INTEGER NOT NULL,   -- newest input candle
+                    days INTEGER NOT NULL,
+                    model_id TEXT NOT NULL,
+                    forecast_json TEXT NOT NULL,           -- {'low','median','high'}
+                    confidence REAL,
+                    model_type TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (secid, source_start_time, source_candle_time, days, model_id)
+                ) WITHOUT ROWID
+            """)
+
             # Quantile zone columns for existing databases
             try:
                 await db.execute("ALTER TABLE ml_predictions ADD COLUMN low_price REAL")
@@ -214,36 +398,153 @@ class Database:
             await db.commit()
             self.logger.info("Database initialized")
 
-    async def insert_candles(self, candles: List[Dict[str, Any]]):
-        """Insert candles into database"""
+    @staticmethod
+    def _candle_rows(candles: List[Dict[str, Any]]) -> tuple:
+        """Validate candles into INSERT parameter tuples.
+        Returns (rows, rejected); each rejected item is {'row', 'error'}."""
+        rows, rejected = [], []
+        for candle in candles:
+            try:
+                # Convert datetime to string if needed
+                candle_time = candle['time']
+                if isinstance(candle_time, datetime):
+                    candle_time = candle_time.isoformat()
+                rows.append((
+                    candle['secid'],
+                    float(candle['open']),
+                    float(candle['close']),
+                    float(candle['low']),
+                    float(candle['high']),
+                    int(candle['volume']),
+                    candle_time
+                ))
+            except (KeyError, TypeError, ValueError) as e:
+                rejected.append({'row': candle, 'error': repr(e)})
+        return rows, rejected
+
+    async def insert_candles(self, candles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert candles with a single executemany in one transaction.
+        Malformed candles are skipped and returned (see _candle_rows)."""
+        rows, rejected = self._candle_rows(candles)
+        if rejected:
+            self.logger.warning(
+                f"Skipped {len(rejected)} of {len(candles)} malformed candles, "
+                f"first: {rejected[0]}")
+        if not rows:
+            return rejected
+        async with self._connect() as db:
+            await db.executemany("""
+                INSERT OR IGNORE INTO candles 
+                (secid, candle_open, candle_close, candle_low, candle_high, candle_volume, candle_time)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            await db.commit()
+        return rejected
+
+    async def insert_candle_arrays(self, secid: str, candles: CandleArrays):
+        """insert_candles for columnar candles (MOEXClient.get_candles_arrays):
+        rows are zipped from whole columns, nothing to validate per row"""
+        if not len(candles):
+            return
+        rows = list(zip(repeat(secid), candles.open.tolist(), candles.close.tolist(),
+                        candles.low.tolist(), candles.high.tolist(),
+                        candles.volume.astype(np.int64).tolist(), candles.time_strings()))
         async with self._connect() as db:
-            for candle in candles:
-                try:
-                    # Convert datetime to string if needed
-                    candle_time = candle['time']
-                    if isinstance(candle_time, datetime):
-                        candle_time = candle_time.isoformat()
-
-                    await db.execute("""
-                        INSERT OR IGNORE INTO candles 
-                        (secid, candle_open, candle_close, candle_low, candle_high, candle_volume, candle_time)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        candle['secid'],
-                        candle['open'],
-                        candle['close'],
-                        candle['low'],
-                        candle['high'],
-                        candle['volume'],
-                        candle_time
-                    ))
-                except Exception as e:
-                    self.logger.error(f"Error inserting candle: {e}")
+            await db.executemany("""
+                INSERT OR IGNORE INTO candles
+                (secid, candle_open, candle_close, candle_low, candle_high, candle_volume, candle_time)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            await db.commit()
+
+    async def insert_minute_candles(self, secid: str, candles: CandleArrays):
+        """Store 1-minute bars; a re-fetched bar replaces the stored one
+        (the last bar of a session is partial until the minute closes)"""
+        if not len(candles):
+            return
+        rows = list(zip(repeat(secid), candles.time.tolist(), candles.open.tolist(),
+                        candles.close.tolist(), candles.low.tolist(), candles.high.tolist(),
+                        candles.volume.astype(np.int64).tolist()))
+        async with self._connect() as db:
+            await db.executemany("""
+                INSERT OR REPLACE INTO candles_1m
+                (secid, candle_time, candle_open, candle_close, candle_low, candle_high, candle_volume)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
             await db.commit()
+        self.intraday.mark_dirty(secid, int(candles.time.min()))
+
+    async def get_minute_span(self, secid: str) -> tuple:
+        """(first, last) stored 1-minute bar time, (None, None) if none"""
+        async with self._read() as db:
+            async with db.execute(
+                    "SELECT MIN(candle_time), MAX(candle_time) FROM candles_1m WHERE secid = ?",
+                    (secid,)) as cursor:
+                row = await cursor.fetchone()
+                return (row[0], row[1]) if row else (None, None)
+
+    async def _read_minutes(self, secid: str, since: int) -> CandleArrays:
+        async with self._read() as db:
+            async with db.execute("""
+                SELECT candle_time, candle_open, candle_high, candle_low, candle_close, candle_volume
+                FROM candles_1m
+                WHERE secid = ? AND candle_time >= ?
+                ORDER BY candle_time ASC
+            """, (secid, since)) as cursor:
+                return CandleArrays.from_rows(await cursor.fetchall())
+
+    async def get_candles_interval(self, secid: str, interval: int = 60,
+                                   days: int = 5) -> CandleArrays:
+        """Bars of an ISS interval code (1/10/60/24) over the last `days`
+        calendar days, resampled from the stored 1-minute bars. A cached
+        window only reads the rows written after it (see IntradayCache)."""
+        if interval not in INTERVAL_MINUTES:
+            raise ValueError(f"unsupported interval {interval}, expected one of {list(INTERVAL_MINUTES)}")
+        since = (to_epoch(datetime.now()) // 86400 - days) * 86400
+        cache = self.intraday
+        if cache.covers(secid, since):
+            from_time, version = cache.refresh_from(secid)
+            rows = await self._read_minutes(secid, from_time)
+            if cache.covers(secid, since):  # not evicted while reading
+                cache.update(secid, from_time, rows, version)
+                return cache.window(secid, since, interval)
+        cache.put(secid, since, await self._read_minutes(secid, since))
+        return cache.window(secid, since, interval)
+
+    async def get_backfilled_dates(self, board: str, from_date: str, till_date: str) -> set:
+        """Trade dates (YYYY-MM-DD) of `board` already backfilled in [from, till]"""
+        async with self._read() as db:
+            async with db.execute("""
+                SELECT trade_date FROM backfill_log
+                WHERE board = ? AND trade_date BETWEEN ? AND ?
+            """, (board, from_date, till_date)) as cursor:
+                return {row[0] for row in await cursor.fetchall()}
+
+    async def insert_board_day(self, board: str, trade_date: str,
+                               candles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Store one board day of candles and mark the day complete in
+        backfill_log, in the same transaction. Returns rejected candles."""
+        rows, rejected = self._candle_rows(candles)
+        if rejected:
+            self.logger.warning(
+                f"Skipped {len(rejected)} of {len(candles)} malformed candles "
+                f"for {board} {trade_date}, first: {rejected[0]}")
+        async with self._connect() as db:
+            await db.executemany("""
+                INSERT OR IGNORE INTO candles
+                (secid, candle_open, candle_close, candle_low, candle_high, candle_volume, candle_time)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            await db.execute("""
+                INSERT OR REPLACE INTO backfill_log (board, trade_date, rows, completed_at)
+                VALUES (?, ?, ?, ?)
+            """, (board, trade_date, len(rows), datetime.now().isoformat()))
+            await db.commit()
+        return rejected
 
     async def get_candles(self, secid: str, days: int = 30) -> List[Dict[str, Any]]:
         """Get candles for a security"""
-        async with self._connect() as db:
+        async with self._read() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT secid, candle_open, candle_close, candle_low, candle_high, 
@@ -275,6 +576,19 @@ class Database:
                     result.append(row_dict)
                 return result
 
+    async def get_candles_arrays(self, secid: str, days: int = 30) -> CandleArrays:
+        """Columnar variant of get_candles for analytics: no per-row dicts,
+        candle_time is converted to epoch seconds by SQLite itself."""
+        async with self._read() as db:
+            async with db.execute("""
+                SELECT CAST(strftime('%s', candle_time) AS INTEGER),
+                       candle_open, candle_high, candle_low, candle_close, candle_volume
+                FROM candles
+                WHERE secid = ? AND candle_time >= datetime('now', '-' || ? || ' days')
+                ORDER BY candle_time ASC
+            """, (secid, days)) as cursor:
+                return CandleArrays.from_rows(await cursor.fetchall())
+
     async def insert_security(self, security: Dict[str, Any]):
         """Insert or update security"""
         async with self._connect() as db:
@@ -300,7 +614,7 @@ class Database:
 
     async def get_security_board_market(self, secid: str) -> Optional[Dict[str, Any]]:
         """Get board and market from database"""
-        async with self._connect() as db:
+        async with self._read() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT board, market, engine FROM securities WHERE secid = ?
@@ -331,7 +645,7 @@ class Database:
 
     async def get_security(self, secid: str) -> Optional[Dict[str, Any]]:
         """Get security by secid"""
-        async with self._connect() as db:
+        async with self._read() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT * FROM securities WHERE secid = ?
@@ -343,17 +657,38 @@ class Database:
                               predicted_price: float, confidence: float, model_type: str,
                               low_price: float = None, high_price: float = None):
         """Save ML prediction (median + optional q10/q90 zone)"""
+        await self.save_predictions(secid, [{
+            'prediction_date': prediction_date,
+            'predicted_price': predicted_price,
+            'low_price': low_price,
+            'high_price': high_price,
+            'confidence': confidence,
+            'model_type': model_type,
+        }])
+
+    async def save_predictions(self, secid: str, rows: List[Dict[str, Any]]):
+        """Upsert a whole forecast horizon in one transaction; a row replaces
+        the previous one for the same (secid, prediction_date, model_type)"""
+        if not rows:
+            return
         async with self._connect() as db:
-            await db.execute("""
-                INSERT OR REPLACE INTO ml_predictions
+            await db.executemany("""
+                INSERT INTO ml_predictions
                 (secid, prediction_date, predicted_price, low_price, high_price, confidence, model_type)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (secid, prediction_date, predicted_price, low_price, high_price, confidence, model_type))
+                ON CONFLICT(secid, prediction_date, model_type) DO UPDATE SET
+                    predicted_price = excluded.predicted_price,
+                    low_price = excluded.low_price,
+                    high_price = excluded.high_price,
+                    confidence = excluded.confidence,
+                    created_at = CURRENT_TIMESTAMP
+            """, [(secid, r['prediction_date'], r['predicted_price'], r.get('low_price'),
+                   r.get('high_price'), r.get('confidence'), r.get('model_type')) for r in rows])
             await db.commit()
 
     async def get_predictions(self, secid: str, days: int = 7) -> List[Dict[str, Any]]:
         """Get ML predictions for a security"""
-        async with self._connect() as db:
+        async with self._read() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT * FROM ml_predictions
@@ -363,11 +698,69 @@ class Database:
                 rows = await cursor.fetchall()
                 return [dict(row) for row in rows]
 
+    async def save_forecast_memo(self, key: tuple, forecast: tuple):
+        """Store a ForecastMemo entry under its full key (secid, first
+        candle, newest candle, days, model id). Entries of the security
+        built from older candles can no longer match and are dropped."""
+        secid, start_time, end_time, days, model_id = key
+        values, confidence, model_type = forecast
+        async with self._connect() as db:
+            await db.execute("DELETE FROM forecast_memo WHERE secid = ? AND source_candle_time < ?",
+                             (secid, end_time))
+            await db.execute("""
+                INSERT OR REPLACE INTO forecast_memo
+                (secid, source_start_time, source_candle_time, days, model_id,
+                 forecast_json, confidence, model_type)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (secid, start_time, end_time, days, model_id, json.dumps(values),
+                  confidence, model_type))
+            await db.commit()
+
+    async def get_forecast_memo(self, key: tuple) -> Optional[tuple]:
+        """Stored (forecast, confidence, model_type) for a ForecastMemo key"""
+        async with self._read() as db:
+            async with db.execute("""
+                SELECT forecast_json, confidence, model_type FROM forecast_memo
+                WHERE secid = ? AND source_start_time = ? AND source_candle_time = ?
+                  AND days = ? AND model_id = ?
+            """, key) as cursor:
+                row = await cursor.fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], row[2]
+
+    async def get_predictions_made_today(self, secids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Forecasts saved today for the upcoming days, {secid: rows ascending
+        by prediction_date}; when several models wrote today the latest wins.
+        Secids without a fresh forecast are absent."""
+        rows: List[Dict[str, Any]] = []
+        async with self._read() as db:
+            db.row_factory = aiosqlite.Row
+            for chunk in chunked(list(dict.fromkeys(secids))):
+                placeholders = ','.join('?' * len(chunk))
+                async with db.execute(f"""
+                    SELECT secid, prediction_date, predicted_price, low_price, high_price,
+                           confidence, model_type, created_at
+                    FROM ml_predictions
+                    WHERE secid IN ({placeholders})
+                      AND created_at >= date('now')
+                      AND prediction_date > date('now', 'localtime')
+                    ORDER BY secid, prediction_date ASC
+                """, chunk) as cursor:
+                    rows += [dict(row) for row in await cursor.fetchall()]
+
+        result = {}
+        for secid, group in groupby(rows, key=lambda r: r['secid']):
+            group = list(group)
+            model_type = max(group, key=lambda r: r['created_at'])['model_type']
+            result[secid] = [r for r in group if r['model_type'] == model_type]
+        return result
+
     async def should_parse_reviews(self, secid: str) -> tuple:
         """Check if reviews should be parsed (not parsed today).
         Timestamps in parse_log are written by Python in local time,
         so the comparison with the local date is consistent."""
-        async with self._connect() as db:
+        async with self._read() as db:
             async with db.execute("""
                 SELECT last_parsed_at FROM parse_log WHERE secid = ?
             """, (secid,)) as cursor:
@@ -378,56 +771,72 @@ class Database:
                 today = datetime.now().date()
                 return last_parsed.date(), last_parsed.date() < today
 
-    async def insert_reviews(self, secid: str, reviews: List[Dict[str, Any]]):
-        """Insert reviews into database"""
+    @staticmethod
+    def _review_rows(secid: str, reviews: List[Dict[str, Any]]) -> tuple:
+        """Prepare reviews into INSERT parameter tuples; reviews without
+        text are dropped silently. Returns (rows, rejected)."""
+        rows, rejected = [], []
+        for review in reviews:
+            try:
+                review_text_ru = review.get('text', '').strip()
+                review_text_en = review.get('text_en', '').strip()
+                if not review_text_ru:
+                    continue
+
+                review_img = review.get('img', '').strip() if review.get('img') else ''
+                review_date = review.get('date')
+                if isinstance(review_date, datetime):
+                    review_date_str = review_date.date().isoformat()
+                elif isinstance(review_date, str):
+                    review_date_str = review_date
+                else:
+                    review_date_str = datetime.now().date().isoformat()
+
+                # Create hash for uniqueness check
+                review_hash = hashlib.md5(f"{secid}:{review_text_ru}:{review_date_str}".encode('utf-8')).hexdigest()
+
+                rows.append((
+                    secid,
+                    review_text_ru,
+                    review_text_en,
+                    review_img,
+                    review_date_str,
+                    review_hash,
+                    review.get('positive', 0),
+                    review.get('neutral', 0),
+                    review.get('negative', 0),
+                    review.get('anger', 0),
+                    review.get('anticipation', 0),
+                    review.get('disgust', 0),
+                    review.get('fear', 0),
+                    review.get('joy', 0),
+                    review.get('sadness', 0),
+                    review.get('surprise', 0),
+                    review.get('trust', 0),
+                    review.get('source', '')
+                ))
+            except (AttributeError, TypeError, ValueError) as e:
+                rejected.append({'row': review, 'error': repr(e)})
+        return rows, rejected
+
+    async def insert_reviews(self, secid: str, reviews: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert reviews with a single executemany in one transaction and
+        touch the parse log. Malformed reviews are skipped and returned."""
+        rows, rejected = self._review_rows(secid, reviews)
+        if rejected:
+            self.logger.warning(
+                f"Skipped {len(rejected)} of {len(reviews)} malformed reviews for {secid}, "
+                f"first error: {rejected[0]['error']}")
         async with self._connect() as db:
-            for review in reviews:
-                try:
-                    review_text_ru = review.get('text', '').strip()
-                    review_text_en = review.get('text_en', '').strip()
-                    if not review_text_ru:
-                        continue
-
-                    review_img = review.get('img', '').strip() if review.get('img') else ''
-                    review_date = review.get('date')
-                    if isinstance(review_date, datetime):
-                        review_date_str = review_date.date().isoformat()
-                    elif isinstance(review_date, str):
-                        review_date_str = review_date
-                    else:
-                        review_date_str = datetime.now().date().isoformat()
-                    
-                    # Create hash for uniqueness check
-                    review_hash = hashlib.md5(f"{secid}:{review_text_ru}:{review_date_str}".encode('utf-8')).hexdigest()
-
-                    await db.execute("""
-                        INSERT OR IGNORE INTO reviews 
-                        (secid, review_text_ru, review_text_en, review_img, review_date, review_hash, positive, neutral, negative, anger, anticipation, disgust, fear, joy, sadness, surprise, trust, source, last_parsed_at)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                    """, (
-                        secid,
-                        review_text_ru,
-                        review_text_en,
-                        review_img,
-                        review_date_str,
-                        review_hash,
-                        review.get('positive', 0),
-                        review.get('neutral', 0),
-                        review.get('negative', 0),
-                        review.get('anger', 0),
-                        review.get('anticipation', 0),
-                        review.get('disgust', 0),
-                        review.get('fear', 0),
-                        review.get('joy', 0),
-                        review.get('sadness', 0),
-                        review.get('surprise', 0),
-                        review.get('trust', 0),
-                        review.get('source', '')
-                    ))
-                except Exception as e:
-                    self.logger.error(f"Error inserting review: {e}")
+            if rows:
+                await db.executemany("""
+                    INSERT OR IGNORE INTO reviews 
+                    (secid, review_text_ru, review_text_en, review_img, review_date, review_hash, positive, neutral, negative, anger, anticipation, disgust, fear, joy, sadness, surprise, trust, source, last_parsed_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                """, rows)
             await self._touch_parse_log(db, secid)
             await db.commit()
+        return rejected
 
     @staticmethod
     async def _touch_parse_log(db, secid: str):
@@ -444,7 +853,7 @@ class Database:
 
     async def get_reviews(self, secid: str, days: int = 7) -> List[Dict[str, Any]]:
         """Get reviews for a security from the last N days"""
-        async with self._connect() as db:
+        async with self._read() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT *
@@ -457,7 +866,7 @@ class Database:
 
     async def get_mean_sentiment(self, secid: str, days: int = 14) -> Dict[str, Any]:
         """Mean positive/negative over recent reviews (for the sentiment veto)"""
-        async with self._connect() as db:
+        async with self._read() as db:
             async with db.execute("""
                 SELECT AVG(positive), AVG(negative), COUNT(*)
                 FROM reviews
@@ -474,7 +883,7 @@ class Database:
 
     async def get_last_candle_date(self, secid: str) -> Optional[str]:
         """Date (YYYY-MM-DD) of the newest stored candle, for incremental sync"""
-        async with self._connect() as db:
+        async with self._read() as db:
             async with db.execute("""
                 SELECT MAX(candle_time) FROM candles WHERE secid = ?
             """, (secid,)) as cursor:
@@ -483,7 +892,7 @@ class Database:
 
     async def get_closes(self, secid: str, days: int = 450) -> List[float]:
         """Close prices ascending for the last N days"""
-        async with self._connect() as db:
+        async with self._read() as db:
             async with db.execute("""
                 SELECT candle_close FROM candles
                 WHERE secid = ? AND candle_time >= datetime('now', '-' || ? || ' days')
@@ -493,7 +902,7 @@ class Database:
                 return [r[0] for r in rows]
 
     async def get_latest_close(self, secid: str) -> Optional[Dict[str, Any]]:
-        async with self._connect() as db:
+        async with self._read() as db:
             async with db.execute("""
                 SELECT candle_close, candle_time FROM candles
                 WHERE secid = ? ORDER BY candle_time DESC LIMIT 1
@@ -501,6 +910,42 @@ class Database:
                 row = await cursor.fetchone()
                 return {'close': row[0], 'time': row[1]} if row else None
 
+    async def get_closes_many(self, secids: List[str], days: int = 450) -> Dict[str, np.ndarray]:
+        """Batch get_closes: {secid: ascending float64 closes} in one query
+        per chunk of secids; unknown secids map to an empty array."""
+        result = {secid: np.empty(0, dtype=np.float64) for secid in secids}
+        async with self._read() as db:
+            for chunk in chunked(list(dict.fromkeys(secids)), MAX_SQL_VARIABLES - 1):
+                placeholders = ','.join('?' * len(chunk))
+                async with db.execute(f"""
+                    SELECT secid, candle_close FROM candles
+                    WHERE secid IN ({placeholders})
+                      AND candle_time >= datetime('now', '-' || ? || ' days')
+                    ORDER BY secid, candle_time ASC
+                """, (*chunk, days)) as cursor:
+                    rows = await cursor.fetchall()
+                for secid, group in groupby(rows, key=lambda r: r[0]):
+                    result[secid] = np.fromiter((r[1] for r in group), dtype=np.float64)
+        return result
+
+    async def get_latest_close_many(self, secids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Batch get_latest_close: {secid: {'close', 'time'}} for secids
+        that have candles, newest row per secid via ROW_NUMBER()."""
+        result = {}
+        async with self._read() as db:
+            for chunk in chunked(list(dict.fromkeys(secids))):
+                placeholders = ','.join('?' * len(chunk))
+                async with db.execute(f"""
+                    SELECT secid, candle_close, candle_time FROM (
+                        SELECT secid, candle_close, candle_time,
+                               ROW_NUMBER() OVER (PARTITION BY secid ORDER BY candle_time DESC) AS rn
+                        FROM candles WHERE secid IN ({placeholders})
+                    ) WHERE rn = 1
+                """, chunk) as cursor:
+                    for secid, close, candle_time in await cursor.fetchall():
+                        result[secid] = {'close': close, 'time': candle_time}
+        return result
+
     # ---------------- Advisor: reports & recommendations ----------------
 
     async def save_weekly_report(self, report: Dict[str, Any]) -> int:
@@ -585,7 +1030,7 @@ class Database:
 
     async def get_reports(self, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
         """Reports newest-first with recommendation counts"""
-        async with self._connect() as db:
+        async with self._read() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT r.*,
@@ -601,7 +1046,7 @@ class Database:
 
     async def get_report(self, report_id: int) -> Optional[Dict[str, Any]]:
         """Report with its recommendations"""
-        async with self._connect() as db:
+        async with self._read() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT * FROM weekly_reports WHERE id = ?
@@ -624,7 +1069,7 @@ class Database:
             return report
 
     async def get_latest_weekly_report(self) -> Optional[Dict[str, Any]]:
-        async with self._connect() as db:
+        async with self._read() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT id FROM weekly_reports WHERE kind = 'weekly'
@@ -636,7 +1081,7 @@ class Database:
     async def get_unevaluated_weekly_report(self, before_week: str) -> Optional[Dict[str, Any]]:
         """Latest weekly report started before `before_week` that still has
         unevaluated recommendations"""
-        async with self._connect() as db:
+        async with self._read() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT DISTINCT r.id, r.week_start FROM weekly_reports r
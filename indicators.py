@@ -3,9 +3,11 @@ Technical Indicators with Explanations and Recommendations
 """
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union
 from datetime import datetime
 
+from candles import CandleArrays
+
 try:
     import talib
     TALIB_AVAILABLE = True
@@ -79,7 +81,7 @@ class IndicatorAnalyzer:
             return 0.0, {'value': 0.0, 'status': 'insufficient_data', 'recommendation': 'Недостаточно данных'}
         
         if TALIB_AVAILABLE:
-            rsi = talib.RSI(np.array(prices), timeperiod=period)[-1]
+            rsi = talib.RSI(np.asarray(prices, dtype=float), timeperiod=period)[-1]
         else:
             # Simple RSI calculation
             deltas = np.diff(prices)
@@ -119,7 +121,7 @@ class IndicatorAnalyzer:
             return 0.0, 0.0, 0.0, {'value': 0.0, 'status': 'insufficient_data', 'recommendation': 'Insufficient data'}
         
         if TALIB_AVAILABLE:
-            macd, signal_line, histogram = talib.MACD(np.array(prices), fastperiod=fast, slowperiod=slow, signalperiod=signal)
+            macd, signal_line, histogram = talib.MACD(np.asarray(prices, dtype=float), fastperiod=fast, slowperiod=slow, signalperiod=signal)
             
             macd_line = list(macd)
             signal_line = list(signal_line)
@@ -172,7 +174,7 @@ class IndicatorAnalyzer:
             return 0.0, 0.0, 0.0, {'value': 0.0, 'status': 'insufficient_data', 'recommendation': 'Insufficient data'}
         
         if TALIB_AVAILABLE:
-            upper, middle, lower = talib.BBANDS(np.array(prices), timeperiod=period, nbdevup=std_dev, nbdevdn=std_dev)
+            upper, middle, lower = talib.BBANDS(np.asarray(prices, dtype=float), timeperiod=period, nbdevup=std_dev, nbdevdn=std_dev)
             upper_val = upper[-1]
             middle_val = middle[-1]
             lower_val = lower[-1]
@@ -245,7 +247,7 @@ class IndicatorAnalyzer:
             return 0.0, {'value': 0.0, 'status': 'insufficient_data', 'recommendation': 'Insufficient data'}
         
         if TALIB_AVAILABLE:
-            adx = talib.ADX(np.array(high), np.array(low), np.array(close), timeperiod=period)[-1]
+            adx = talib.ADX(np.asarray(high, dtype=float), np.asarray(low, dtype=float), np.asarray(close, dtype=float), timeperiod=period)[-1]
         else:
             adx = self._adx_wilder(high, low, close, period)
             if adx is None:
@@ -310,7 +312,7 @@ class IndicatorAnalyzer:
 
     def _ema(self, prices: List[float], period: int) -> List[float]:
         """Calculate Exponential Moving Average"""
-        if not prices or period <= 0:
+        if len(prices) == 0 or period <= 0:
             return []
         
         multiplier = 2 / (period + 1)
@@ -321,15 +323,18 @@ class IndicatorAnalyzer:
         
         return ema
     
-    def analyze_all(self, candles: List[Dict]) -> Dict:
-        """Calculate all indicators"""
+    def analyze_all(self, candles: Union[CandleArrays, List[Dict]]) -> Dict:
+        """Calculate all indicators (columnar CandleArrays are used as is)"""
         if not candles or len(candles) < 20:
             return {'error': 'Insufficient data for analysis'}
         
-        prices = [c['close'] for c in candles]
-        high = [c['high'] for c in candles]
-        low = [c['low'] for c in candles]
-        close = [c['close'] for c in candles]
+        if isinstance(candles, CandleArrays):
+            high, low, close = candles.high, candles.low, candles.close
+        else:
+            high = [c['high'] for c in candles]
+            low = [c['low'] for c in candles]
+            close = [c['close'] for c in candles]
+        prices = close
         
         results = {}
         
@@ -8,10 +8,14 @@ model reliably beats that; the zone width is the honest uncertainty.
 """
 import numpy as np
 import logging
-from typing import List, Dict, Tuple, Optional
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Tuple, Optional, Union
 import warnings
 warnings.filterwarnings('ignore')
 
+from candles import CandleArrays
+
 try:
     import torch
     TORCH_AVAILABLE = True
@@ -37,39 +41,70 @@ class ChronosPredictor:
     def __init__(self):
         self.logger = logging.getLogger("ml_models")
         self._pipeline = None
+        # predict() may run on several analytics threads at once (app.py)
+        self._load_lock = threading.Lock()
 
     def _load(self):
-        if self._pipeline is None:
-            device = "cuda" if torch.cuda.is_available() else "cpu"
-            self._pipeline = BaseChronosPipeline.from_pretrained(
-                self.MODEL_ID,
-                device_map=device,
-                torch_dtype=torch.bfloat16 if device == "cuda" else torch.float32,
-            )
-            self.logger.info(f"Chronos-Bolt loaded on {device}")
+        with self._load_lock:
+            if self._pipeline is None:
+                device = "cuda" if torch.cuda.is_available() else "cpu"
+                self._pipeline = BaseChronosPipeline.from_pretrained(
+                    self.MODEL_ID,
+                    device_map=device,
+                    torch_dtype=torch.bfloat16 if device == "cuda" else torch.float32,
+                )
+                self.logger.info(f"Chronos-Bolt loaded on {device}")
         return self._pipeline
 
-    def predict(self, prices: List[float], days: int = 7) -> Optional[Dict[str, List[float]]]:
+    def predict(self, prices: Union[List[float], np.ndarray], days: int = 7) -> Optional[Dict[str, List[float]]]:
         """Returns {'low': [...], 'median': [...], 'high': [...]} of length `days`"""
-        if not CHRONOS_AVAILABLE or len(prices) < self.MIN_CONTEXT:
-            return None
+        return self.predict_batch([prices], days=days)[0]
+
+    def predict_batch(self, series: List[Union[List[float], np.ndarray]], days: int = 7,
+                      batch_size: int = 32) -> List[Optional[Dict[str, List[float]]]]:
+        """predict() for many series at once, same order as `series`.
+
+        Series are grouped by length and left-padded with NaN (Chronos treats
+        NaN as missing context) into [batch, max_len] tensors, so one forward
+        pass serves up to `batch_size` securities.
+        """
+        results: List[Optional[Dict[str, List[float]]]] = [None] * len(series)
+        if not CHRONOS_AVAILABLE:
+            return results
+        usable = sorted((i for i, s in enumerate(series) if len(s) >= self.MIN_CONTEXT),
+                        key=lambda i: len(series[i]))
+        if not usable:
+            return results
         try:
             pipeline = self._load()
-            context = torch.tensor(prices, dtype=torch.float32)
-            quantiles, _ = pipeline.predict_quantiles(
-                context,
-                prediction_length=days,
-                quantile_levels=self.QUANTILES,
-            )
-            q = quantiles[0].cpu().numpy()  # shape: [days, 3]
-            return {
-                'low': [float(v) for v in q[:, 0]],
-                'median': [float(v) for v in q[:, 1]],
-                'high': [float(v) for v in q[:, 2]],
-            }
         except Exception as e:
-            self.logger.error(f"Chronos prediction error: {e}")
-            return None
+            self.logger.error(f"Chronos load error: {e}")
+            return results
+
+        for start in range(0, len(usable), batch_size):
+            chunk = usable[start:start + batch_size]
+            width = len(series[chunk[-1]])
+            context = np.full((len(chunk), width), np.nan, dtype=np.float32)
+            for row, i in enumerate(chunk):
+                values = np.asarray(series[i], dtype=np.float32)
+                context[row, width - len(values):] = values
+            try:
+                quantiles, _ = pipeline.predict_quantiles(
+                    torch.as_tensor(context),
+                    prediction_length=days,
+                    quantile_levels=self.QUANTILES,
+                )
+            except Exception as e:
+                self.logger.error(f"Chronos prediction error: {e}")
+                continue
+            q = quantiles.cpu().numpy()  # shape: [batch, days, 3]
+            for row, i in enumerate(chunk):
+                results[i] = {
+                    'low': q[row, :, 0].tolist(),
+                    'median': q[row, :, 1].tolist(),
+                    'high': q[row, :, 2].tolist(),
+                }
+        return results
 
 
 class SimpleMovingAveragePredictor:
@@ -81,27 +116,96 @@ class SimpleMovingAveragePredictor:
     def predict(self, prices: List[float], days: int = 7) -> List[float]:
         """Predict using moving average"""
         if len(prices) < self.window:
-            return [prices[-1]] * days if prices else []
+            return [prices[-1]] * days if len(prices) else []
 
         ma = np.mean(prices[-self.window:])
         trend = (prices[-1] - prices[-self.window]) / self.window if len(prices) > self.window else 0
 
         predictions = []
         for i in range(1, days + 1):
-            predictions.append(ma + trend * i)
+            predictions.append(float(ma + trend * i))
 
         return predictions
 
 
+Forecast = Tuple[Dict[str, List[float]], float, str]
+
+
+class ForecastMemo:
+    """Thread-safe LRU of forecasts keyed by (secid, first candle epoch,
+    newest candle epoch, horizon, model id), see MLPredictor.forecast_key"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Forecast]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.db_loads = 0
+
+    def __contains__(self, key: tuple) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key: tuple) -> Optional[Forecast]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple, value: Forecast):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries,
+                    'hits': self.hits, 'misses': self.misses, 'db_loads': self.db_loads}
+
+
 class MLPredictor:
     """Main ML predictor interface"""
 
-    def __init__(self):
+    def __init__(self, memo_size: int = 512):
         self.chronos = ChronosPredictor()
         self.sma = SimpleMovingAveragePredictor()
+        self.memo = ForecastMemo(memo_size)
         self.logger = logging.getLogger("ml_models")
 
-    def predict(self, candles: List[Dict], days: int = 7) -> Tuple[Dict[str, List[float]], float, str]:
+    @property
+    def model_id(self) -> str:
+        return ChronosPredictor.MODEL_ID if CHRONOS_AVAILABLE else 'sma'
+
+    def forecast_key(self, secid: str, candles: CandleArrays, days: int = 7) -> Optional[tuple]:
+        """Memo key: (secid, first candle, newest candle, days, model). The
+        input series changes when a newer candle arrives or the window
+        differs (/api/security reads 60 days, the portfolio 120)"""
+        if not len(candles):
+            return None
+        return secid, int(candles.time[0]), int(candles.time[-1]), days, self.model_id
+
+    def predict_memo(self, secid: str, candles: CandleArrays,
+                     days: int = 7) -> Tuple[Forecast, bool]:
+        """predict() through the memo: (result, fresh), fresh=False on a hit"""
+        key = self.forecast_key(secid, candles, days)
+        if key is not None:
+            cached = self.memo.get(key)
+            if cached is not None:
+                return cached, False
+        result = self.predict(candles, days=days)
+        if key is not None and result[2] != 'none':
+            self.memo.put(key, result)
+        return result, True
+
+    def predict(self, candles: Union[CandleArrays, List[Dict]],
+                days: int = 7) -> Tuple[Dict[str, List[float]], float, str]:
         """
         Predict future price zone.
         Returns: (forecast {'low','median','high'}, confidence, model_type)
@@ -113,9 +217,31 @@ class MLPredictor:
         if not candles or len(candles) < 30:
             return {}, 0.0, 'none'
 
-        prices = [c['close'] for c in candles]
+        if isinstance(candles, CandleArrays):
+            prices = candles.close
+        else:
+            prices = [c['close'] for c in candles]
+
+        return self._finish(prices, self.chronos.predict(prices, days=days), days)
+
+    def predict_many(self, series: Dict[str, Union[List[float], np.ndarray]], days: int = 7,
+                     batch_size: int = 32) -> Dict[str, Tuple[Dict[str, List[float]], float, str]]:
+        """predict() over {secid: closes} with batched Chronos inference;
+        returns {secid: (forecast, confidence, model_type)}"""
+        secids = list(series)
+        forecasts = self.chronos.predict_batch([series[s] for s in secids],
+                                               days=days, batch_size=batch_size)
+        results = {}
+        for secid, forecast in zip(secids, forecasts):
+            prices = series[secid]
+            if len(prices) < 30:
+                results[secid] = ({}, 0.0, 'none')
+            else:
+                results[secid] = self._finish(prices, forecast, days)
+        return results
 
-        forecast = self.chronos.predict(prices, days=days)
+    def _finish(self, prices, forecast: Optional[Dict[str, List[float]]],
+                days: int) -> Tuple[Dict[str, List[float]], float, str]:
         if forecast:
             widths = [
                 (h - l) / m
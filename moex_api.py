@@ -1,11 +1,65 @@
 """
 MOEX API Client
 """
+import json
+import time
+import random
+import asyncio
 import aiohttp
 import logging
-from typing import Optional, List, Dict, Any
+from contextlib import nullcontext
+from collections import deque
+from typing import Optional, List, Dict, Any, AsyncIterator, Deque, Tuple
 from datetime import datetime, timedelta
 from cache import CacheManager
+from candles import CandleArrays
+
+
+def create_session(limit: int = 100, limit_per_host: int = 20,
+                   keepalive_timeout: float = 60.0, dns_ttl: int = 600) -> aiohttp.ClientSession:
+    """Long-lived session for ISS: keep-alive connections are reused across
+    requests, so only the first call to a host pays the TCP+TLS handshake."""
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout,
+        ttl_dns_cache=dns_ttl,
+        enable_cleanup_closed=True,
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+# ISS returns at most this many candles per request
+CANDLES_PAGE_SIZE = 500
+
+
+class ISSPageError(Exception):
+    """A page of a paginated ISS walk could not be fetched"""
+
+
+# Columns the client methods actually read, per ISS block (see projection)
+SECURITY_COLUMNS = ["SECID", "BOARDID", "SHORTNAME", "SECNAME", "PREVPRICE", "LOTSIZE",
+                    "ISIN", "CURRENCYID", "SECTYPE"]
+MARKETDATA_COLUMNS = ["SECID", "LAST", "MARKETPRICE", "LCURRENTPRICE", "VOLTODAY", "VALTODAY",
+                      "UPDATETIME"]
+CANDLE_COLUMNS = ["open", "close", "high", "low", "volume", "begin"]
+HISTORY_COLUMNS = ["SECID", "OPEN", "LOW", "HIGH", "CLOSE", "VOLUME"]
+BOARD_COLUMNS = ["boardid", "market", "engine", "is_primary", "is_traded"]
+INDEX_COLUMNS = ["indexid", "shortname", "from", "till"]
+INDEX_SECURITY_COLUMNS = ["indexid", "tradedate", "ticker", "shortnames", "secids", "weight"]
+
+
+def projection(only: Dict[str, Optional[List[str]]]) -> Dict[str, str]:
+    """
+    ISS parameters that trim a response to the blocks a caller reads:
+    {block: [columns] or None for every column}. Metadata and the other
+    blocks (marketdata_yields, dataversion, ...) are not sent at all.
+    """
+    params = {'iss.meta': 'off', 'iss.only': ','.join(only)}
+    for block, columns in only.items():
+        if columns:
+            params[f'{block}.columns'] = ','.join(columns)
+    return params
 
 
 class MOEXClient:
@@ -13,146 +67,363 @@ class MOEXClient:
 
     BASE_URL = "https://iss.moex.com/iss"
 
-    def __init__(self, cache_manager: Optional[CacheManager] = None, throttle=None):
+    def __init__(self, cache_manager: Optional[CacheManager] = None, throttle=None,
+                 session: Optional[aiohttp.ClientSession] = None,
+                 stale_hours: float = 0, negative_ttl: float = 30.0):
         self.logger = logging.getLogger("moex")
-        self.session: Optional[aiohttp.ClientSession] = None
+        # A borrowed session (app-lifetime, see create_session) is never
+        # closed by the client; its owner closes it on shutdown.
+        self.session: Optional[aiohttp.ClientSession] = session
+        self._owns_session = session is None
         self.cache = cache_manager
-        # Optional async callable awaited before each real HTTP request
-        # (cache hits skip it). Used by the advisor to rate-limit ISS calls.
+        # Optional async context manager entered around each real HTTP
+        # request (cache hits skip it). Used by the advisor to rate-limit
+        # ISS calls and bound the number of requests in flight.
         self.throttle = throttle
+        # Single-flight: identical requests already on the wire, so
+        # concurrent callers share one upstream call
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # key -> callers awaiting it; the last one to be cancelled cancels
+        # the request (a background stale refresh counts as one for good)
+        self._waiters: Dict[str, int] = {}
+        # Stale-while-revalidate: expired entries are still served for
+        # stale_hours while one background fetch refreshes them (0 = off)
+        self.stale_hours = stale_hours
+        # Negative cache: a failed request is not retried upstream before
+        # its jittered backoff (negative_ttl seconds, doubling per failure)
+        self.negative_ttl = negative_ttl
+        self._failures: Dict[str, tuple] = {}  # key -> (failures in a row, retry_at)
+        self._stats = {'cache_hits': 0, 'stale_served': 0, 'upstream': 0, 'coalesced': 0,
+                       'failures': 0, 'negative_hits': 0, 'truncated_walks': 0}
 
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        if self._owns_session:
+            self.session = aiohttp.ClientSession()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
+        if self._owns_session and self.session:
             await self.session.close()
+            self.session = None
 
-    async def query(self, method: str, use_cache: bool = True, cache_ttl_hours: int = 24, **kwargs) -> Optional[Dict]:
-        """Query MOEX ISS API with caching"""
+    async def query(self, method: str, use_cache: bool = True, cache_ttl_hours: int = 24,
+                    only: Dict[str, Optional[List[str]]] = None, **kwargs) -> Optional[Dict]:
+        """Query MOEX ISS API with caching. `only` limits the response to
+        the given blocks/columns (see projection); being part of the
+        request parameters, it is part of the cache key too."""
         url = f"{self.BASE_URL}/{method}.json"
 
         # ISS expects "from", which is a reserved word in Python kwargs;
         # without this rename ISS silently ignores "from_" and returns
         # candles from the very start of trading history (2007+).
         params = {("from" if k == "from_" else k): v for k, v in kwargs.items()}
+        if only:
+            params.update(projection(only))
+
+        key = url + json.dumps(params, sort_keys=True, default=str)
 
         # Try cache first
+        stale = None
         if use_cache and self.cache:
-            cached_data = self.cache.get(
-                url, params, ttl_hours=cache_ttl_hours)
-            if cached_data is not None:
-                self.logger.debug(f"Cache hit: {method}")
-                return cached_data
-
-        if self.throttle:
-            await self.throttle()
-
-        # Fetch from API
-        try:
-            async with self.session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    # Cache the result
-                    if use_cache and self.cache:
-                        self.cache.set(url, data, params)
+            hit = self.cache.get_entry(
+                url, params, ttl_hours=cache_ttl_hours, stale_hours=self.stale_hours)
+            if hit is not None:
+                data, is_stale = hit
+                if not is_stale:
+                    self.logger.debug(f"Cache hit: {method}")
+                    self._stats['cache_hits'] += 1
                     return data
-                else:
-                    self.logger.error(f"MOEX API error: {response.status}")
-                    return None
+                stale = data
+
+        if self._backing_off(key):
+            self._stats['negative_hits'] += 1
+            if stale is not None:
+                self._stats['stale_served'] += 1
+            return stale
+
+        # Join an identical request that is already in flight
+        pending = self._inflight.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._fetch(key, url, params, use_cache, cache_ttl_hours))
+            self._inflight[key] = pending
+            self._waiters[key] = 0
+            pending.add_done_callback(lambda _: self._forget(key, pending))
+        elif stale is None:
+            self._stats['coalesced'] += 1
+
+        if stale is not None:
+            # Answer now; the fetch above refreshes the entry in the background
+            self._waiters[key] += 1
+            self._stats['stale_served'] += 1
+            return stale
+        # shield: a cancelled caller must not cancel the fetch other waiters
+        # share; the fetch is cancelled only once nobody waits for it
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            if self._inflight.get(key) is pending:
+                self._waiters[key] -= 1
+                if not self._waiters[key]:
+                    pending.cancel()
+                    self._forget(key, pending)
+            raise
+
+    def _forget(self, key: str, pending: asyncio.Future):
+        if self._inflight.get(key) is pending:
+            del self._inflight[key]
+            self._waiters.pop(key, None)
+
+    def _backing_off(self, key: str) -> bool:
+        failure = self._failures.get(key)
+        return failure is not None and time.monotonic() < failure[1]
+
+    def _record_failure(self, key: str):
+        if len(self._failures) > 1000:
+            now = time.monotonic()
+            self._failures = {k: v for k, v in self._failures.items() if v[1] > now}
+        count = self._failures.get(key, (0, 0))[0] + 1
+        backoff = min(self.negative_ttl * 2 ** (count - 1), 600) * random.uniform(0.5, 1.5)
+        self._failures[key] = (count, time.monotonic() + backoff)
+        self._stats['failures'] += 1
+
+    async def _fetch(self, key: str, url: str, params: Dict, use_cache: bool,
+                     cache_ttl_hours: int) -> Optional[Dict]:
+        self._stats['upstream'] += 1
+        try:
+            async with self.throttle or nullcontext():
+                async with self.session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                    if response.status == 200:
+                        data = await response.json()
+                        self._failures.pop(key, None)
+                        # Cache the result (kept through the stale window)
+                        if use_cache and self.cache:
+                            self.cache.set(url, data, params,
+                                           ttl_hours=cache_ttl_hours + self.stale_hours)
+                        return data
+                    else:
+                        self.logger.error(f"MOEX API error: {response.status}")
+                        self._record_failure(key)
+                        return None
         except Exception as e:
             self.logger.error(f"Error querying MOEX API: {e}")
+            self._record_failure(key)
             return None
 
+    def stats(self) -> Dict[str, int]:
+        """Cache hits, stale answers, real ISS calls, coalesced calls,
+        failures / calls answered by the negative cache and paginated
+        walks cut short by a failed page"""
+        return {**self._stats, 'inflight': len(self._inflight)}
+
     @staticmethod
-    def flatten(data: Dict, blockname: str) -> List[Dict]:
+    def block(data: Dict, blockname: str) -> Tuple[List[str], List[list]]:
+        """(columns, rows) of an ISS block, both empty if it is missing"""
+        block = data.get(blockname) if data else None
+        if not block or 'columns' not in block or 'data' not in block:
+            return [], []
+        return block['columns'], block['data']
+
+    @classmethod
+    def flatten(cls, data: Dict, blockname: str) -> List[Dict]:
         """Flatten MOEX API response"""
-        if not data or blockname not in data:
-            return []
-
-        block = data[blockname]
-        if 'columns' not in block or 'data' not in block:
-            return []
-
-        columns = block['columns']
-        return [{columns[i]: row[i] for i in range(len(columns))} for row in block['data']]
+        columns, rows = cls.block(data, blockname)
+        return [dict(zip(columns, row)) for row in rows]
 
     async def get_securities(self, board: str = "TQBR", market: str = "shares") -> List[Dict]:
         """Get list of securities"""
-        data = await self.query(f"engines/stock/markets/{market}/boards/{board}/securities")
+        data = await self.query(f"engines/stock/markets/{market}/boards/{board}/securities",
+                                only={"securities": SECURITY_COLUMNS})
         if data:
             return self.flatten(data, "securities")
         return []
 
     async def get_security_info(self, secid: str, board: str = "TQBR", market: str = "shares") -> Optional[Dict]:
         """Get security information"""
-        data = await self.query(f"engines/stock/markets/{market}/boards/{board}/securities/{secid}")
+        data = await self.query(f"engines/stock/markets/{market}/boards/{board}/securities/{secid}",
+                                only={"securities": SECURITY_COLUMNS})
         if data:
             securities = self.flatten(data, "securities")
             return securities[0] if securities else None
         return None
 
-    async def get_candles(self, secid: str, board: str = "TQBR", market: str = "shares",
-                          interval: int = 24, days: int = 30,
-                          engine: str = "stock",
-                          from_date: str = None, till_date: str = None,
-                          use_cache: bool = True) -> List[Dict]:
+    async def query_pages(self, method: str, blockname: str, page_size: int = None,
+                          prefetch: int = 1, use_cache: bool = True, cache_ttl_hours: int = 24,
+                          strict: bool = False, only: Dict[str, Optional[List[str]]] = None,
+                          flat: bool = True, **kwargs) -> AsyncIterator:
         """
-        Get candles for security
-        interval: 1 (1 min), 10 (10 min), 60 (1 hour), 24 (1 day), 7 (1 week), 31 (1 month)
-        from_date/till_date (YYYY-MM-DD) override the days-based window,
-        used for incremental sync by the advisor.
+        Walk an ISS endpoint page by page with the start= cursor, yielding
+        the flattened rows of `blockname` per page as they arrive.
+        The page size is taken from a `<blockname>.cursor` block when ISS
+        sends one, otherwise from `page_size` or the length of the first
+        (full) page; a shorter page ends the walk. Up to `prefetch` next
+        pages are requested ahead, so memory stays bounded by prefetch+1
+        pages however long the history is. Leaving the walk early (break,
+        error) cancels the pages requested ahead, unless another caller
+        shares them. A failed page raises ISSPageError with strict=True;
+        otherwise it ends the walk early, logged and counted in
+        stats()['truncated_walks']. flat=False yields each page as raw
+        (columns, rows) for columnar parsing.
         """
+        start = kwargs.pop('start', 0)
+        if only:
+            # The cursor block drives the walk, keep it in the projection
+            only = {**only, f"{blockname}.cursor": None}
+
+        def fetch(offset: int) -> asyncio.Task:
+            # The first page keeps the un-paginated cache key
+            params = {**kwargs, 'start': offset} if offset else kwargs
+            return asyncio.ensure_future(self.query(
+                method, use_cache=use_cache, cache_ttl_hours=cache_ttl_hours, only=only, **params))
+
+        ahead: Deque[Tuple[int, asyncio.Task]] = deque([(start, fetch(start))])
+        total = None
+        try:
+            while ahead:
+                offset, task = ahead.popleft()
+                data = await task
+                if data is None:
+                    if strict:
+                        raise ISSPageError(f"{method}: page at start={offset} failed")
+                    self._stats['truncated_walks'] += 1
+                    self.logger.error(f"ISS pagination of {method} stopped at start={offset}, "
+                                      f"result is truncated")
+                    return
+                columns, rows = self.block(data, blockname)
+                cursor = self.flatten(data, f"{blockname}.cursor")
+                if cursor:
+                    total = cursor[0].get('TOTAL')
+                    page_size = cursor[0].get('PAGESIZE') or page_size
+                if page_size is None:
+                    page_size = len(rows)
+
+                done = not rows or len(rows) < page_size
+                if total is not None:
+                    done = offset + page_size >= total
+                if not done:
+                    # Put `prefetch` requests in flight before handing this
+                    # page over, so they overlap with its consumption
+                    next_offset = (ahead[-1][0] if ahead else offset) + page_size
+                    while len(ahead) < max(prefetch, 1) and (total is None or next_offset < total):
+                        ahead.append((next_offset, fetch(next_offset)))
+                        next_offset += page_size
+                if rows:
+                    yield [dict(zip(columns, row)) for row in rows] if flat else (columns, rows)
+                if done:
+                    return
+        finally:
+            for _, task in ahead:
+                task.cancel()
+
+    async def iter_candle_arrays(self, secid: str, board: str = "TQBR", market: str = "shares",
+                                 interval: int = 24, days: int = 30, engine: str = "stock",
+                                 from_date: str = None, till_date: str = None,
+                                 use_cache: bool = True, prefetch: int = 1,
+                                 strict: bool = False) -> AsyncIterator[CandleArrays]:
+        """One CandleArrays per ISS page (500 rows each), parsed column-wise
+        (see CandleArrays.from_iss) — multi-year daily or intraday backfills.
+        strict=True raises ISSPageError on a failed page (see query_pages)."""
         if not till_date:
             till_date = datetime.now().strftime("%Y-%m-%d")
         if not from_date:
             from_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
 
-        data = await self.query(
+        async for page in self.query_pages(
             f"engines/{engine}/markets/{market}/boards/{board}/securities/{secid}/candles",
+            "candles",
+            page_size=CANDLES_PAGE_SIZE,
+            prefetch=prefetch,
             use_cache=use_cache,
+            only={"candles": CANDLE_COLUMNS},
             interval=interval,
             from_=from_date,
-            till=till_date
-        )
+            till=till_date,
+            strict=strict,
+            flat=False
+        ):
+            yield CandleArrays.from_iss(*page)
+
+    async def iter_candles(self, secid: str, board: str = "TQBR", market: str = "shares",
+                           interval: int = 24, days: int = 30, engine: str = "stock",
+                           from_date: str = None, till_date: str = None,
+                           use_cache: bool = True, prefetch: int = 1,
+                           strict: bool = False) -> AsyncIterator[Dict]:
+        """Candles in get_candles format, streamed across all ISS pages"""
+        async for page in self.iter_candle_arrays(
+                secid, board=board, market=market, interval=interval, days=days, engine=engine,
+                from_date=from_date, till_date=till_date, use_cache=use_cache, prefetch=prefetch,
+                strict=strict):
+            for candle in page.to_records(secid):
+                yield candle
+
+    async def get_candles_arrays(self, secid: str, board: str = "TQBR", market: str = "shares",
+                                 interval: int = 24, days: int = 30, engine: str = "stock",
+                                 from_date: str = None, till_date: str = None,
+                                 use_cache: bool = True, strict: bool = False) -> CandleArrays:
+        """get_candles as one CandleArrays, without a dict per candle.
+        Without strict a failed page ends the series early (see query_pages)."""
+        return CandleArrays.concat([page async for page in self.iter_candle_arrays(
+            secid, board=board, market=market, interval=interval, days=days, engine=engine,
+            from_date=from_date, till_date=till_date, use_cache=use_cache, strict=strict)])
 
-        if data:
-            candles = self.flatten(data, "candles")
-            # Convert to our format
-            result = []
-            for candle in candles:
-                try:
-                    begin_str = candle.get('begin', '')
-                    if begin_str:
-                        # Handle different date formats
-                        begin_str = begin_str.replace('Z', '+00:00')
-                        if '+' not in begin_str and 'T' in begin_str:
-                            begin_str += '+00:00'
-                        candle_time = datetime.fromisoformat(begin_str)
-                    else:
-                        candle_time = datetime.now()
-
-                    result.append({
-                        'secid': secid,
-                        'open': float(candle.get('open', 0)) if candle.get('open') else 0.0,
-                        'close': float(candle.get('close', 0)) if candle.get('close') else 0.0,
-                        'low': float(candle.get('low', 0)) if candle.get('low') else 0.0,
-                        'high': float(candle.get('high', 0)) if candle.get('high') else 0.0,
-                        'volume': int(candle.get('volume', 0)) if candle.get('volume') else 0,
-                        'time': candle_time
-                    })
-                except Exception as e:
-                    self.logger.error(
-                        f"Error parsing candle: {e}, candle: {candle}")
+    async def get_candles(self, secid: str, board: str = "TQBR", market: str = "shares",
+                          interval: int = 24, days: int = 30,
+                          engine: str = "stock",
+                          from_date: str = None, till_date: str = None,
+                          use_cache: bool = True, strict: bool = False) -> List[Dict]:
+        """
+        Get candles for security
+        interval: 1 (1 min), 10 (10 min), 60 (1 hour), 24 (1 day), 7 (1 week), 31 (1 month)
+        from_date/till_date (YYYY-MM-DD) override the days-based window,
+        used for incremental sync by the advisor. Windows longer than one
+        ISS page are fetched page by page (see iter_candles); a failed page
+        raises ISSPageError with strict=True, otherwise the list ends early
+        and stats()['truncated_walks'] counts it.
+        """
+        return [candle async for candle in self.iter_candles(
+            secid, board=board, market=market, interval=interval, days=days, engine=engine,
+            from_date=from_date, till_date=till_date, use_cache=use_cache, strict=strict)]
+
+    async def get_board_history(self, trade_date: str, board: str = "TQBR",
+                                market: str = "shares", engine: str = "stock",
+                                use_cache: bool = True, prefetch: int = 1) -> List[Dict]:
+        """
+        Daily candles of every security on a board for one trading day
+        (ISS history by date, 100 rows a page), in get_candles format.
+        Securities without trades that day are left out. Raises
+        ISSPageError when a page fails, so a partial day is never
+        mistaken for a complete one.
+        """
+        candle_time = datetime.strptime(trade_date, "%Y-%m-%d")
+        candles = []
+        async for page in self.query_pages(
+            f"history/engines/{engine}/markets/{market}/boards/{board}/securities",
+            "history",
+            prefetch=prefetch,
+            use_cache=use_cache,
+            strict=True,
+            only={"history": HISTORY_COLUMNS},
+            date=trade_date
+        ):
+            for row in page:
+                if not row.get('SECID') or row.get('CLOSE') is None or row.get('OPEN') is None:
                     continue
-            return result
-        return []
+                candles.append({
+                    'secid': row['SECID'],
+                    'open': float(row['OPEN']),
+                    'close': float(row['CLOSE']),
+                    'low': float(row.get('LOW') or row['CLOSE']),
+                    'high': float(row.get('HIGH') or row['CLOSE']),
+                    'volume': int(row.get('VOLUME') or 0),
+                    'time': candle_time
+                })
+        return candles
 
     async def get_indexes(self) -> List[Dict]:
         """Get list of indexes (cached for 7 days)"""
         data = await self.query("statistics/engines/stock/markets/index/analytics",
-                                use_cache=True, cache_ttl_hours=168)  # 7 days
+                                use_cache=True, cache_ttl_hours=168,  # 7 days
+                                only={"indices": INDEX_COLUMNS})
         if data:
             return self.flatten(data, "indices")
         return []
@@ -163,6 +434,7 @@ class MOEXClient:
             f"statistics/engines/stock/markets/index/analytics/{indexid}",
             use_cache=True,
             cache_ttl_hours=168,  # 7 days
+            only={"analytics": INDEX_SECURITY_COLUMNS},
             limit=limit
         )
         if data:
@@ -182,7 +454,8 @@ class MOEXClient:
                 board = board or 'TQBR'
                 market = market or 'shares'
 
-        data = await self.query(f"engines/stock/markets/{market}/boards/{board}/securities/{secid}")
+        data = await self.query(f"engines/stock/markets/{market}/boards/{board}/securities/{secid}",
+                                only={"securities": SECURITY_COLUMNS})
         if data:
             securities = self.flatten(data, "securities")
             if securities:
@@ -191,38 +464,111 @@ class MOEXClient:
                     return float(prevprice)
         return None
 
+    async def get_board_snapshot(self, board: str = "TQBR", market: str = "shares",
+                                 engine: str = "stock", use_cache: bool = True,
+                                 cache_ttl_hours: float = 1 / 60) -> Dict[str, Dict]:
+        """
+        Every security on a board in one call: {secid: {...}} with the
+        previous close, current market data and today's volume.
+        'price' is LAST when the board is trading, otherwise the current
+        market price or PREVPRICE. Cached for a minute by default.
+        """
+        data = await self.query(
+            f"engines/{engine}/markets/{market}/boards/{board}/securities",
+            use_cache=use_cache, cache_ttl_hours=cache_ttl_hours,
+            only={"securities": SECURITY_COLUMNS, "marketdata": MARKETDATA_COLUMNS})
+        if not data:
+            return {}
+
+        marketdata = {row.get('SECID'): row for row in self.flatten(data, "marketdata")}
+        snapshot = {}
+        for sec in self.flatten(data, "securities"):
+            secid = sec.get('SECID')
+            if not secid:
+                continue
+            md = marketdata.get(secid, {})
+            entry = {
+                'secid': secid,
+                'board': sec.get('BOARDID') or board,
+                'shortname': sec.get('SHORTNAME'),
+                'lotsize': sec.get('LOTSIZE'),
+                'prevprice': sec.get('PREVPRICE'),
+                'last': md.get('LAST'),
+                'marketprice': md.get('MARKETPRICE') or md.get('LCURRENTPRICE'),
+                'volume': md.get('VOLTODAY'),
+                'value': md.get('VALTODAY'),
+                'updatetime': md.get('UPDATETIME'),
+            }
+            price = entry['last'] or entry['marketprice'] or entry['prevprice']
+            entry['price'] = float(price) if price else None
+            snapshot[secid] = entry
+        return snapshot
+
+    async def get_last_prices(self, secids: List[str], db=None,
+                              live: bool = False) -> Dict[str, float]:
+        """
+        Batch get_last_price: one board snapshot per distinct board instead
+        of one request per security. Returns PREVPRICE like get_last_price,
+        or the current price with live=True; unknown secids are left out.
+        """
+        # Lookups run concurrently; the client throttle paces the ISS ones
+        board_markets = await asyncio.gather(
+            *(self.get_security_board_market(secid, db=db) for secid in secids))
+        boards: Dict[Tuple[str, str, str], List[str]] = {}
+        for secid, board_market in zip(secids, board_markets):
+            board_market = board_market or {}
+            group = (board_market.get('board', 'TQBR'), board_market.get('market', 'shares'),
+                     board_market.get('engine', 'stock'))
+            boards.setdefault(group, []).append(secid)
+
+        snapshots = await asyncio.gather(*(
+            self.get_board_snapshot(board, market, engine)
+            for board, market, engine in boards))
+
+        prices: Dict[str, float] = {}
+        for members, snapshot in zip(boards.values(), snapshots):
+            for secid in members:
+                entry = snapshot.get(secid)
+                if not entry:
+                    continue
+                price = entry['price'] if live else entry['prevprice']
+                if price:
+                    prices[secid] = float(price)
+        return prices
+
     # Справочники
     async def get_security_types(self) -> List[Dict]:
         """Get security types"""
-        data = await self.query("securitytypes")
+        data = await self.query("securitytypes", only={"securitytypes": None})
         if data:
             return self.flatten(data, "securitytypes")
         return []
 
     async def get_security_groups(self, trade_engine: str = "stock") -> List[Dict]:
         """Get security groups"""
-        data = await self.query("securitygroups", trade_engine=trade_engine)
+        data = await self.query("securitygroups", trade_engine=trade_engine,
+                                only={"securitygroups": None})
         if data:
             return self.flatten(data, "securitygroups")
         return []
 
     async def get_engines(self) -> List[Dict]:
         """Get trading engines"""
-        data = await self.query("engines")
+        data = await self.query("engines", only={"engines": None})
         if data:
             return self.flatten(data, "engines")
         return []
 
     async def get_markets(self, engine: str = "stock") -> List[Dict]:
         """Get markets for engine"""
-        data = await self.query(f"engines/{engine}/markets")
+        data = await self.query(f"engines/{engine}/markets", only={"markets": None})
         if data:
             return self.flatten(data, "markets")
         return []
 
     async def get_boards(self, engine: str = "stock", market: str = "shares") -> List[Dict]:
         """Get boards for market"""
-        data = await self.query(f"engines/{engine}/markets/{market}/boards")
+        data = await self.query(f"engines/{engine}/markets/{market}/boards", only={"boards": None})
         if data:
             return self.flatten(data, "boards")
         return []
@@ -230,7 +576,7 @@ class MOEXClient:
     # Дивиденды
     async def get_dividends(self, secid: str) -> List[Dict]:
         """Get dividends for security"""
-        data = await self.query(f"securities/{secid}/dividends")
+        data = await self.query(f"securities/{secid}/dividends", only={"dividends": None})
         if data:
             return self.flatten(data, "dividends")
         return []
@@ -238,7 +584,7 @@ class MOEXClient:
     # Купоны
     async def get_coupons(self, secid: str) -> List[Dict]:
         """Get coupons for bond"""
-        data = await self.query(f"securities/{secid}/bondization", iss_meta="off")
+        data = await self.query(f"securities/{secid}/bondization", only={"coupons": None})
         if data:
             coupons = self.flatten(data, "coupons")
             return coupons
@@ -247,14 +593,14 @@ class MOEXClient:
     # Новости
     async def get_news(self, lang: str = "ru", limit: int = 10) -> List[Dict]:
         """Get exchange news"""
-        data = await self.query("news", lang=lang, limit=limit)
+        data = await self.query("news", lang=lang, limit=limit, only={"news": None})
         if data:
             return self.flatten(data, "news")
         return []
 
     async def get_events(self, lang: str = "ru", limit: int = 10) -> List[Dict]:
         """Get exchange events"""
-        data = await self.query("events", lang=lang, limit=limit)
+        data = await self.query("events", lang=lang, limit=limit, only={"events": None})
         if data:
             return self.flatten(data, "events")
         return []
@@ -271,6 +617,7 @@ class MOEXClient:
 
         data = await self.query(
             f"history/engines/{engine}/markets/{market}/yields/{secid}",
+            only={"history": None},
             from_=from_date,
             till=till_date
         )
@@ -281,7 +628,7 @@ class MOEXClient:
     # Спецификация инструмента
     async def get_security_specification(self, secid: str) -> Dict:
         """Get full security specification"""
-        data = await self.query(f"securities/{secid}")
+        data = await self.query(f"securities/{secid}", only={"description": None, "boards": None})
         if data:
             description = self.flatten(data, "description")
             boards = self.flatten(data, "boards")
@@ -306,7 +653,8 @@ class MOEXClient:
 
         # If not in DB, fetch from API with long-term cache (1 year = 8760 hours)
         # Data changes rarely, so we cache for a long time
-        data = await self.query(f"securities/{secid}", use_cache=True, cache_ttl_hours=8760)
+        data = await self.query(f"securities/{secid}", use_cache=True, cache_ttl_hours=8760,
+                                only={"boards": BOARD_COLUMNS})
         if not data:
             return None
 
@@ -369,6 +717,7 @@ class MOEXClient:
 
         data = await self.query(
             f"history/engines/{engine}/markets/{market}/boards/{board}/securities/{secid}/sessions",
+            only={"history": None},
             from_=from_date,
             till=till_date
         )
@@ -379,7 +728,7 @@ class MOEXClient:
     # Поиск бумаг
     async def search_securities(self, query: str, lang: str = "ru") -> List[Dict]:
         """Search securities by query"""
-        data = await self.query("securities", q=query, lang=lang)
+        data = await self.query("securities", q=query, lang=lang, only={"securities": None})
         if data:
             return self.flatten(data, "securities")
         return []
@@ -387,7 +736,7 @@ class MOEXClient:
     # Индексы в которые входит бумага
     async def get_security_indices(self, secid: str) -> List[Dict]:
         """Get indices that include this security"""
-        data = await self.query(f"securities/{secid}/indices")
+        data = await self.query(f"securities/{secid}/indices", only={"indices": None})
         if data:
             return self.flatten(data, "indices")
         return []
@@ -400,6 +749,7 @@ class MOEXClient:
 
         data = await self.query(
             f"statistics/engines/stock/markets/index/analytics/{indexid}",
+            only={"analytics": None},
             date=date
         )
         if data:
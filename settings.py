@@ -31,7 +31,18 @@ DEFAULTS = {
         "sentiment_veto_threshold": -0.3,
         "sentiment_min_posts": 5,
         "max_reviews_per_job": 300,
+        "analysis_batch_size": 16,  # reviews per FinBERT/emotion forward pass
         "high_rate_level": 12.0,  # CBR key rate above this = cash is king
+        # ISS pacing for candle/dividend sync: token bucket of sync_rate
+        # requests per second, at most sync_concurrency in flight
+        "sync_rate": 3.0,
+        "sync_concurrency": 4,
+        # Chronos forecasts per forward pass in the weekly pipeline
+        "forecast_batch_size": 32,
+        # History backfill by trading day (tasks.run_backfill): boards as
+        # "engine/market/board", calendar days back from yesterday
+        "backfill_boards": ["stock/shares/TQBR", "stock/shares/TQTF", "stock/bonds/TQOB"],
+        "backfill_days": 400,
         # Schedule (Europe/Moscow)
         "weekly_day": "sat",
         "weekly_hour": 8,
@@ -41,6 +52,31 @@ DEFAULTS = {
         # by more than this fraction since the weekly report
         "alarm_move": 0.05,
     },
+    "web": {
+        # Analytics pool of the web process (indicators + forecast per
+        # request): worker threads, jobs allowed to wait before 503, and
+        # the per-job time budget in seconds
+        "analytics_workers": 2,
+        "analytics_queue": 8,
+        "analytics_timeout": 30.0,
+        # /api/portfolio/calculate: securities forecast at the same time
+        "portfolio_concurrency": 4,
+        # ISS answers older than their TTL are still served for this many
+        # hours while a background request refreshes them
+        "iss_stale_hours": 6,
+        # /api/security/<secid>/indicators: longest window of stored
+        # 1-minute bars, and how often one security re-syncs them from ISS
+        "intraday_max_days": 30,
+        "intraday_sync_seconds": 60,
+        # Days of 1-minute bars fetched inside a request; older ones load
+        # in the background
+        "intraday_sync_days": 1,
+        # Securities whose older 1-minute bars load from ISS at the same time
+        "intraday_backfills": 2,
+        # Failed ISS requests are not retried for ~N seconds (jittered,
+        # doubling per consecutive failure, capped at 10 minutes)
+        "iss_negative_ttl": 30.0,
+    },
 }
 
 
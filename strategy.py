@@ -14,10 +14,13 @@ Only components with credible academic evidence, at weekly frequency:
 - Hysteresis between entry/hold thresholds for low turnover
   (transaction costs: Novy-Marx & Velikov 2016).
 """
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 
 import numpy as np
 
+# Price series: plain lists or float64 arrays (Database.get_candles_arrays)
+Series = Union[List[float], np.ndarray]
+
 TRADING_DAYS_YEAR = 252
 TRADING_DAYS_MONTH = 21
 
@@ -74,7 +77,7 @@ def allocation(reg: Dict) -> Dict[str, float]:
 
 # ---------------- per-asset components ----------------
 
-def tsmom(prices: List[float]) -> Dict[str, Optional[float]]:
+def tsmom(prices: Series) -> Dict[str, Optional[float]]:
     """Time-series momentum: 12-1 (skip last month) and 3-month returns."""
     n = len(prices)
     out = {'m12_1': None, 'm3': None}
@@ -82,19 +85,19 @@ def tsmom(prices: List[float]) -> Dict[str, Optional[float]]:
         p_start = prices[-TRADING_DAYS_YEAR]
         p_end = prices[-TRADING_DAYS_MONTH]
         if p_start > 0:
-            out['m12_1'] = p_end / p_start - 1.0
+            out['m12_1'] = float(p_end / p_start - 1.0)
     if n > 3 * TRADING_DAYS_MONTH:
         p_start = prices[-3 * TRADING_DAYS_MONTH]
         if p_start > 0:
-            out['m3'] = prices[-1] / p_start - 1.0
+            out['m3'] = float(prices[-1] / p_start - 1.0)
     return out
 
 
-def ann_vol(prices: List[float]) -> Optional[float]:
+def ann_vol(prices: Series) -> Optional[float]:
     """Annualized volatility of daily returns"""
     if len(prices) < 30:
         return None
-    arr = np.asarray(prices, dtype=float)
+    arr = np.asarray(prices, dtype=float)  # no copy for float64 arrays
     rets = np.diff(arr) / arr[:-1]
     return float(np.std(rets) * np.sqrt(TRADING_DAYS_YEAR))
 
@@ -4,6 +4,7 @@ Celery tasks: heavy work lives here, not in the web process.
 - parse_reviews: scrape + neural analysis of social posts for one security
 - run_weekly_advisor: Saturday full report (see advisor.py)
 - run_midweek_check: Thursday intermediate report with alarms
+- run_backfill: manual history-by-date candle backfill of whole boards
 """
 import re
 import sys
@@ -42,6 +43,7 @@ def _get_ctx():
         _ctx["db"] = Database()
         _ctx["parser"] = ReviewsParser()
         _ctx["analyser"] = TextAnalyser()
+        _ctx["analyser"].translator.warm_up()
         _ctx["store"] = JobStore(redis_lib.Redis.from_url(REDIS_URL))
     return _ctx
 
@@ -55,6 +57,16 @@ def _redis_unlock(name: str):
     redis_lib.Redis.from_url(REDIS_URL).delete(f"lock:{name}")
 
 
+def _translation_direction(text: str):
+    """(src_lang, trg_lang): Russian posts go to English for the models,
+    English ones to Russian for display"""
+    total_chars = len(text.replace(" ", ""))
+    ratio_ru = len(re.findall(r'[А-Яа-яЁё]', text)) / total_chars if total_chars else 0
+    if ratio_ru > 0.1:
+        return 'Russian', 'English'
+    return 'English', 'Russian'
+
+
 @app.task(name="tasks.parse_reviews")
 def parse_reviews(secid: str, user_id: str, job_id: str):
     ctx = _get_ctx()
@@ -115,36 +127,60 @@ async def _parse_reviews_async(ctx, secid: str, user_id: str, job_id: str):
 
         update("analyzing", total=len(reviews), current=0)
 
+        # Each chunk is translated with one executor job per direction, then
+        # the sentiment/emotion models run once over it; cancel checks and
+        # progress happen between chunks
+        batch_size = CONFIG["advisor"].get("analysis_batch_size", 16)
+        directions = [_translation_direction(review.get("text") or "") for review in reviews]
+        # Re-parsed and cross-posted reviews: resolve them all in one cache query
+        cached = analyser.translator.lookup_many([
+            (src, trg, review["text"])
+            for review, (src, trg) in zip(reviews, directions) if review.get("text")])
+        logger.info(f"[Job {job_id}] {len(cached)} of {len(reviews)} translations cached")
         analysis_reviews = []
         loop = asyncio.get_event_loop()
-        for i, review in enumerate(reviews):
+        for start in range(0, len(reviews), batch_size):
             if store.is_cancelled(job_id):
                 logger.info(f"[Job {job_id}] Cancel requested, stopping")
                 update("cancelled")
                 return
-            try:
-                review_text = review.get("text", "")
-                if not review_text:
+            indices = [i for i in range(start, min(start + batch_size, len(reviews)))
+                       if reviews[i].get("text")]
+            for src_lang, trg_lang in {directions[i] for i in indices}:
+                missing = [reviews[i]["text"] for i in indices if directions[i] == (src_lang, trg_lang)
+                           and (src_lang, trg_lang, reviews[i]["text"]) not in cached]
+                if not missing:
                     continue
-
-                # Detect language and translate accordingly
-                total_chars = len(review_text.replace(" ", ""))
-                ratio_ru = len(re.findall(r'[А-Яа-яЁё]', review_text)) / total_chars if total_chars else 0
-                if ratio_ru > 0.1:
-                    translated_text = await analyser.translator.translate(
-                        review_text, src_lang='Russian', trg_lang='English')
-                    review_text_ru = review_text
+                try:
+                    # lookup_many above already missed these in the cache
+                    translated = await analyser.translator.translate_many(
+                        missing, src_lang=src_lang, trg_lang=trg_lang, lookup=False)
+                    cached.update({(src_lang, trg_lang, t): tr for t, tr in zip(missing, translated)})
+                except Exception as e:
+                    logger.error(f"[Job {job_id}] Error translating reviews {start}-{start + batch_size}: {e}")
+
+            chunk = []
+            for i in indices:
+                review, (src_lang, trg_lang) = reviews[i], directions[i]
+                translated = cached.get((src_lang, trg_lang, review["text"]))
+                if translated is None:
+                    continue
+                if src_lang == 'Russian':
+                    chunk.append((review, str(translated), review["text"]))
                 else:
-                    translated_text = review_text
-                    review_text_ru = await analyser.translator.translate(
-                        review_text, src_lang='English', trg_lang='Russian')
+                    chunk.append((review, review["text"], translated))
 
-                analysis = await loop.run_in_executor(
+            try:
+                analyses = await loop.run_in_executor(
                     None,
-                    analyser._analyze_neural_networks_sync,
-                    translated_text,
-                    review.get("img"),
+                    analyser.analyze_batch_sync,
+                    [(translated_text, review.get("img")) for review, translated_text, _ in chunk],
+                    batch_size,
                 )
+            except Exception as e:
+                logger.error(f"[Job {job_id}] Error analyzing reviews {start}-{start + len(chunk)}: {e}")
+                analyses = []
+            for (review, translated_text, review_text_ru), analysis in zip(chunk, analyses):
                 if analysis is not None:
                     analysis_reviews.append({
                         **review,
@@ -152,10 +188,7 @@ async def _parse_reviews_async(ctx, secid: str, user_id: str, job_id: str):
                         'text_en': translated_text,
                         'text_ru': review_text_ru,
                     })
-            except Exception as e:
-                logger.error(f"[Job {job_id}] Error analyzing review {i}: {e}")
-            finally:
-                update("analyzing", current=i + 1)
+            update("analyzing", current=min(start + batch_size, len(reviews)))
 
         try:
             import torch
@@ -175,6 +208,9 @@ async def _parse_reviews_async(ctx, secid: str, user_id: str, job_id: str):
     except Exception as e:
         logger.error(f"[Job {job_id}] Error parsing reviews for {secid}: {e}")
         update("error", error=str(e))
+    finally:
+        # Pooled connections belong to this asyncio.run loop
+        await db.close()
 
 
 @app.task(name="tasks.run_weekly_advisor", bind=True, max_retries=1, default_retry_delay=600)
@@ -204,3 +240,17 @@ def run_midweek_check():
         asyncio.run(run_midweek_pipeline())
     finally:
         _redis_unlock("midweek_check")
+
+
+@app.task(name="tasks.run_backfill")
+def run_backfill(boards: list = None, days: int = None):
+    """Manual: history-by-date candle backfill for whole boards"""
+    if not _redis_lock("backfill", ttl=6 * 3600):
+        logger.warning("Backfill is already running, skipping")
+        return
+    try:
+        _ensure_project_path()
+        from advisor import run_backfill as run_backfill_async
+        asyncio.run(run_backfill_async(boards=boards, days=days))
+    finally:
+        _redis_unlock("backfill")
@@ -0,0 +1,81 @@
+"""
+Unit tests for analytics_pool.py (bounded analytics executor)
+Run: venv/bin/python -m pytest test_analytics_pool.py -q  (or python test_analytics_pool.py)
+"""
+import asyncio
+import threading
+
+from analytics_pool import AnalyticsBusy, AnalyticsPool, AnalyticsTimeout
+
+
+def test_runs_off_the_event_loop():
+    async def main():
+        pool = AnalyticsPool(workers=1, max_queue=0)
+        try:
+            name = await pool.run(lambda: threading.current_thread().name)
+            assert name.startswith("analytics")
+            assert pool.stats()['completed'] == 1
+        finally:
+            pool.close()
+    asyncio.run(main())
+
+
+def test_rejects_when_saturated():
+    async def main():
+        release = threading.Event()
+        pool = AnalyticsPool(workers=1, max_queue=1)
+        try:
+            running = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+            await asyncio.sleep(0)
+            try:
+                await pool.run(release.wait)
+                assert False, "third job should be rejected"
+            except AnalyticsBusy:
+                pass
+            release.set()
+            assert await asyncio.gather(*running) == [True, True]
+            assert pool.stats()['rejected'] == 1
+            assert pool.stats()['pending'] == 0
+        finally:
+            pool.close()
+    asyncio.run(main())
+
+
+def test_timeout_keeps_slot_until_job_finishes():
+    async def main():
+        release = threading.Event()
+        pool = AnalyticsPool(workers=1, max_queue=0, timeout=0.05)
+        try:
+            try:
+                await pool.run(release.wait)
+                assert False, "job should time out"
+            except AnalyticsTimeout as e:
+                # a slow job is not reported as a saturated pool
+                assert not isinstance(e, AnalyticsBusy)
+            # the abandoned job still holds the only worker
+            try:
+                await pool.run(lambda: 1)
+                assert False, "pool should still be saturated"
+            except AnalyticsBusy:
+                pass
+            release.set()
+            await asyncio.sleep(0.05)
+            assert await pool.run(lambda: 1) == 1
+            assert pool.stats()['timeouts'] == 1
+        finally:
+            pool.close()
+    asyncio.run(main())
+
+
+if __name__ == '__main__':
+    import sys
+    failures = 0
+    for name, fn in sorted(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            try:
+                fn()
+                print(f"PASS {name}")
+            except AssertionError as e:
+                failures += 1
+                print(f"FAIL {name}: {e}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,138 @@
+"""
+Unit tests for cache.py (memory LRU in front of the file cache)
+Run: venv/bin/python -m pytest test_cache.py -q  (or python test_cache.py)
+"""
+import tempfile
+
+from cache import CacheManager, decode_payload, encode_payload
+
+
+def make_cache(**kwargs):
+    return CacheManager(cache_dir=tempfile.mkdtemp(), **kwargs)
+
+
+def test_memory_tier_serves_repeat_reads():
+    cache = make_cache()
+    cache.set("https://iss/indexes.json", {"rows": [1, 2, 3]})
+    for _ in range(3):
+        assert cache.get("https://iss/indexes.json") == {"rows": [1, 2, 3]}
+    stats = cache.stats()
+    assert (stats['memory_hits'], stats['disk_hits'], stats['misses']) == (3, 0, 0)
+
+
+def test_disk_tier_fills_memory_on_miss():
+    cache_dir = tempfile.mkdtemp()
+    CacheManager(cache_dir=cache_dir).set("https://iss/boards.json", [1], {"q": "SBER"})
+    cache = CacheManager(cache_dir=cache_dir)
+    assert cache.get("https://iss/boards.json", {"q": "SBER"}) == [1]
+    assert cache.get("https://iss/boards.json", {"q": "SBER"}) == [1]
+    assert cache.get("https://iss/boards.json", {"q": "GAZP"}) is None
+    stats = cache.stats()
+    assert (stats['memory_hits'], stats['disk_hits'], stats['misses']) == (1, 1, 1)
+
+
+def test_ttl_applies_to_memory_tier():
+    cache = make_cache()
+    cache.set("https://iss/x.json", 1)
+    assert cache.get("https://iss/x.json", ttl_hours=0) is None
+    assert cache.stats()['memory_entries'] == 0
+
+
+def test_lru_respects_entry_and_byte_budget():
+    cache = make_cache(memory_entries=2)
+    for name in ("a", "b", "c"):
+        cache.set(f"https://iss/{name}.json", name)
+    assert cache.stats()['memory_entries'] == 2
+    assert cache.stats()['evictions'] == 1
+
+    small = make_cache(memory_bytes=200)
+    small.set("https://iss/big.json", "x" * 500)
+    assert small.stats()['memory_entries'] == 0
+    assert small.get("https://iss/big.json") == "x" * 500  # still on disk
+
+
+def test_expiry_is_one_delete():
+    cache = make_cache()
+    cache.set("https://iss/short.json", 1, ttl_hours=-1)
+    cache.set("https://iss/long.json", 2)
+    cache.clear_expired()
+    assert cache.store.load(cache._get_cache_key("https://iss/short.json")) is None
+    assert cache.get("https://iss/long.json") == 2
+
+
+def test_file_backend_keeps_the_same_interface():
+    cache = make_cache(backend="files")
+    cache.set("https://iss/x.json", {"a": 1}, {"p": 1})
+    fresh = CacheManager(cache_dir=str(cache.cache_dir), backend="files")
+    assert fresh.get("https://iss/x.json", {"p": 1}) == {"a": 1}
+    assert len(list(cache.cache_dir.glob("*.json"))) == 1
+
+
+def test_payload_codec_roundtrip():
+    small = {"a": [1, 2.5, "тикер"]}
+    large = {"candles": {"columns": ["open", "close"], "data": [[100.5, 101.0]] * 500}}
+    assert encode_payload(small)[1:2] == b'-'
+    assert encode_payload(large)[1:2] == b'z'
+    for data in (small, large, [], None):
+        assert decode_payload(encode_payload(data)) == data
+    assert decode_payload(b'{"legacy": true}') == {"legacy": True}
+
+
+def test_migrate_moves_files_into_sqlite():
+    cache_dir = tempfile.mkdtemp()
+    CacheManager(cache_dir=cache_dir, backend="files").set("https://iss/old.json", {"rows": [1]})
+    cache = CacheManager(cache_dir=cache_dir)
+    cache.migrate()
+    assert not list(cache.cache_dir.glob("*.json"))
+    assert cache.get("https://iss/old.json") == {"rows": [1]}
+
+
+def test_headerless_rows_are_reencoded_once():
+    cache = make_cache()
+    conn = cache.store._conn
+    conn.execute("INSERT INTO cache (key, url, cached_at, expires_at, size, payload) "
+                 "VALUES ('k', 'u', 0, 1e12, 2, X'7B7D')")
+    cache.migrate()
+    assert conn.execute("SELECT payload FROM cache WHERE key = 'k'").fetchone()[0][:1] in (b'j', b'm')
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 1
+    # a later start-up does not scan the table again
+    conn.execute("UPDATE cache SET payload = X'7B7D' WHERE key = 'k'")
+    cache.migrate()
+    assert conn.execute("SELECT payload FROM cache WHERE key = 'k'").fetchone()[0] == b'{}'
+
+
+def test_write_is_skipped_while_another_process_holds_the_lock():
+    import sqlite3
+    import time
+
+    cache = make_cache()
+    cache.set("https://iss/a.json", {"a": 1})
+    cache._forget(cache._get_cache_key("https://iss/a.json"))
+    other = sqlite3.connect(str(cache.cache_dir / "cache.db"))
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.perf_counter()
+        cache.set("https://iss/b.json", {"b": 2})
+        assert time.perf_counter() - started < 2
+        assert cache.stats()['busy_skips'] == 1
+        # WAL: reads do not wait for the other writer
+        assert cache.get("https://iss/a.json") == {"a": 1}
+    finally:
+        other.rollback()
+        other.close()
+    cache.set("https://iss/b.json", {"b": 2})
+    assert cache.stats()['busy_skips'] == 1
+
+
+if __name__ == '__main__':
+    import sys
+    failures = 0
+    for name, fn in sorted(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            try:
+                fn()
+                print(f"PASS {name}")
+            except AssertionError as e:
+                failures += 1
+                print(f"FAIL {name}: {e}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,207 @@
+"""
+Unit tests for candles.py (columnar OHLCV container)
+Run: venv/bin/python -m pytest test_candles.py -q  (or python test_candles.py)
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from candles import CandleArrays, IntradayCache, from_epoch, resample, to_epoch
+
+
+def make_records(n: int = 5):
+    start = datetime(2024, 1, 15)
+    return [
+        {'secid': 'SBER', 'open': 100.0 + i, 'close': 101.0 + i, 'low': 99.0 + i,
+         'high': 102.0 + i, 'volume': 1000 + i, 'time': start + timedelta(days=i)}
+        for i in range(n)
+    ]
+
+
+def test_epoch_naive_is_utc():
+    assert to_epoch(datetime(1970, 1, 2)) == 86400
+    assert to_epoch('1970-01-02T00:00:00') == 86400
+    assert to_epoch('1970-01-02T03:00:00+03:00') == 86400
+    assert from_epoch(86400) == datetime(1970, 1, 2)
+
+
+def test_from_rows_is_contiguous_float64():
+    arr = CandleArrays.from_rows([(86400, 1, 3, 0.5, 2, 10), (172800, 2, 4, 1.5, 3, 20)])
+    assert len(arr) == 2
+    assert arr.time.dtype == np.int64 and arr.close.dtype == np.float64
+    assert arr.close.flags['C_CONTIGUOUS'] and arr.volume.flags['C_CONTIGUOUS']
+    assert arr.high.tolist() == [3.0, 4.0]
+
+
+def test_empty():
+    arr = CandleArrays.from_rows([])
+    assert len(arr) == 0 and not arr
+    assert arr.close.shape == (0,)
+
+
+def test_records_round_trip():
+    records = make_records()
+    arr = CandleArrays.from_records(records)
+    back = arr.to_records('SBER')
+    assert back == records
+
+
+def test_tail():
+    arr = CandleArrays.from_records(make_records(10))
+    tail = arr.tail(3)
+    assert len(tail) == 3
+    assert tail.close.tolist() == arr.close[-3:].tolist()
+
+
+def test_from_iss_parses_columns_in_bulk():
+    columns = ["open", "close", "high", "low", "value", "volume", "begin", "end"]
+    data = [
+        [100.0, 101.0, 102.0, 99.0, 1e5, 1000, "2024-01-15 10:00:00", "2024-01-15 10:59:59"],
+        [None, 102.0, 103.0, 100.0, 1e5, None, "2024-01-15 11:00:00", "2024-01-15 11:59:59"],
+        [1.0, 1.0, 1.0, 1.0, 1.0, 1, None, None],  # no begin: dropped
+    ]
+    arr = CandleArrays.from_iss(columns, data)
+    assert len(arr) == 2
+    assert arr.time.tolist() == [to_epoch(datetime(2024, 1, 15, 10)), to_epoch(datetime(2024, 1, 15, 11))]
+    assert arr.open.tolist() == [100.0, 0.0] and arr.volume.tolist() == [1000.0, 0.0]
+    assert arr.to_records('SBER')[0] == {'secid': 'SBER', 'open': 100.0, 'close': 101.0, 'low': 99.0,
+                                         'high': 102.0, 'volume': 1000,
+                                         'time': datetime(2024, 1, 15, 10)}
+    # offsets are not NumPy-parsable: the column falls back to to_epoch
+    odd = CandleArrays.from_iss(["begin", "close"], [["2024-01-15T13:00:00+03:00", 1.0], ["bad", 2.0]])
+    assert odd.time.tolist() == [to_epoch(datetime(2024, 1, 15, 10))] and odd.close.tolist() == [1.0]
+    utc = CandleArrays.from_iss(["begin"], [["2024-01-15T13:00:00+03:00"]])
+    assert utc.time.tolist() == [to_epoch(datetime(2024, 1, 15, 10))]
+
+
+def test_time_strings_match_stored_format():
+    records = make_records(3)
+    arr = CandleArrays.concat([CandleArrays.from_records(records[:1]), CandleArrays.from_records(records[1:])])
+    assert arr.time_strings() == [r['time'].isoformat() for r in records]
+    assert len(CandleArrays.concat([])) == 0
+
+
+def make_minutes(n: int, start: datetime = datetime(2024, 1, 15, 9, 57)) -> CandleArrays:
+    rng = np.random.default_rng(7)
+    close = 100 + np.cumsum(rng.normal(0, 0.1, n))
+    t0 = to_epoch(start)
+    return CandleArrays(t0 + np.arange(n) * 60, close + 0.05, close + 0.2, close - 0.2, close,
+                        rng.integers(1, 100, n))
+
+
+def test_resample_matches_bar_by_bar_aggregation():
+    minutes = make_minutes(200)
+    bars = resample(minutes, 60)
+    assert bars.time.tolist() == [to_epoch(datetime(2024, 1, 15, h)) for h in (9, 10, 11, 12, 13)]
+    for i, t in enumerate(bars.time):
+        mask = (minutes.time >= t) & (minutes.time < t + 3600)
+        assert bars.open[i] == minutes.open[mask][0] and bars.close[i] == minutes.close[mask][-1]
+        assert bars.high[i] == minutes.high[mask].max() and bars.low[i] == minutes.low[mask].min()
+        assert bars.volume[i] == minutes.volume[mask].sum()
+    assert len(resample(minutes, 10)) == 21  # 09:50 bar holds 3 minutes
+    assert len(resample(minutes, 1440)) == 1
+    assert resample(minutes, 1) is minutes
+
+
+def test_intraday_cache_tops_up_and_reresamples_rewritten_bars():
+    cache = IntradayCache(max_securities=2)
+    minutes = make_minutes(120, start=datetime(2024, 1, 15, 10))
+    since = int(minutes.time[0])
+    cache.put('SBER', since, minutes.before(int(minutes.time[100])))
+    first = cache.window('SBER', since, 10)
+    assert cache.window('SBER', since, 10) is not None and cache.stats()['hits'] == 1
+    from_time, version = cache.refresh_from('SBER')
+    assert from_time == int(minutes.time[99]) + 1
+    cache.update('SBER', from_time, minutes.starting(from_time), version)
+    assert cache.window('SBER', since, 1).close.tolist() == minutes.close.tolist()
+    assert len(cache.window('SBER', since, 10)) == len(resample(minutes, 10)) > len(first)
+
+    cache.mark_dirty('SBER', int(minutes.time[50]))
+    assert cache.refresh_from('SBER') == (int(minutes.time[50]), version + 1)
+    cache.put('GAZP', since, minutes)
+    cache.put('LKOH', since, minutes)
+    assert not cache.covers('SBER', since) and cache.covers('LKOH', since + 60)
+    assert not cache.covers('LKOH', since - 60)
+
+
+def test_minute_store_serves_resampled_intervals():
+    import asyncio
+    import tempfile
+    from database import Database
+
+    async def main():
+        db = Database(db_path=f"{tempfile.mkdtemp()}/test.db")
+        try:
+            await db.init_db()
+            today = datetime.now().replace(hour=10, minute=0, second=0, microsecond=0)
+            minutes = make_minutes(180, start=today)
+            await db.insert_minute_candles('SBER', minutes)
+            await db.insert_minute_candles('SBER', minutes.tail(5))  # re-fetched bars replace
+            first, last = await db.get_minute_span('SBER')
+            assert (first, last) == (int(minutes.time[0]), int(minutes.time[-1]))
+            stored = await db.get_candles_interval('SBER', 1, days=1)
+            assert stored.close.tolist() == minutes.close.tolist()
+            hourly = await db.get_candles_interval('SBER', 60, days=1)
+            assert hourly.close.tolist() == resample(minutes, 60).close.tolist()
+            await db.get_candles_interval('SBER', 60, days=1)
+            assert db.intraday.stats()['hits'] == 1
+            try:
+                await db.get_candles_interval('SBER', 5)
+                assert False, "interval 5 is not an ISS code"
+            except ValueError:
+                pass
+        finally:
+            await db.close()
+    asyncio.run(main())
+
+
+def test_minute_store_rereads_replaced_last_bar():
+    import asyncio
+    import tempfile
+    from database import Database
+
+    async def main():
+        db = Database(db_path=f"{tempfile.mkdtemp()}/test.db")
+        try:
+            await db.init_db()
+            today = datetime.now().replace(hour=10, minute=0, second=0, microsecond=0)
+            minutes = make_minutes(30, start=today)
+            await db.insert_minute_candles('SBER', minutes)
+            hourly = await db.get_candles_interval('SBER', 60, days=1)
+            assert hourly.close.tolist() == [minutes.close[-1]]
+
+            # the still-forming last bar is re-fetched with a new close
+            last = minutes.tail(1)
+            await db.insert_minute_candles('SBER', CandleArrays(
+                last.time, last.open, np.array([500.0]), last.low, np.array([4.0]), np.array([99])))
+            hourly = await db.get_candles_interval('SBER', 60, days=1)
+            assert hourly.close.tolist() == [4.0]
+            assert hourly.high.tolist() == [500.0]
+            assert hourly.volume.tolist() == [int(minutes.volume[:-1].sum()) + 99]
+
+            # bars appended by another writer are picked up from the tail
+            more = make_minutes(31, start=today).tail(1)
+            async with db._connect() as conn:
+                await conn.execute("INSERT INTO candles_1m VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                   ('SBER', int(more.time[0]), float(more.open[0]), float(more.close[0]),
+                                    float(more.low[0]), float(more.high[0]), int(more.volume[0])))
+                await conn.commit()
+            stored = await db.get_candles_interval('SBER', 1, days=1)
+            assert len(stored) == 31 and stored.close[-1] == more.close[0]
+        finally:
+            await db.close()
+    asyncio.run(main())
+
+
+if __name__ == '__main__':
+    import sys
+    failures = 0
+    for name, fn in sorted(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            try:
+                fn()
+                print(f"PASS {name}")
+            except AssertionError as e:
+                failures += 1
+                print(f"FAIL {name}: {e}")
+    sys.exit(1 if failures else 0)
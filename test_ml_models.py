@@ -0,0 +1,165 @@
+"""
+Unit tests for ml_models.py batch forecasting
+Run: venv/bin/python -m pytest test_ml_models.py -q  (or python test_ml_models.py)
+"""
+import numpy as np
+
+from candles import CandleArrays
+from ml_models import ForecastMemo, MLPredictor
+
+
+def make_series():
+    rng = np.random.default_rng(7)
+    return {
+        'LONG': 100 * np.cumprod(1 + rng.normal(0, 0.01, 400)),
+        'SHORT': 50 * np.cumprod(1 + rng.normal(0, 0.01, 45)),
+        'TINY': np.array([10.0, 10.5, 11.0]),
+    }
+
+
+def test_predict_many_matches_predict():
+    predictor = MLPredictor()
+    series = make_series()
+    batch = predictor.predict_many(series, days=7, batch_size=2)
+    assert list(batch) == list(series)
+    for secid, closes in series.items():
+        forecast, confidence, model = predictor.predict([{'close': c} for c in closes], days=7)
+        b_forecast, b_confidence, b_model = batch[secid]
+        assert b_model == model
+        assert abs(b_confidence - confidence) < 1e-6
+        for key in forecast:
+            assert np.allclose(b_forecast[key], forecast[key], rtol=1e-4)
+
+
+class FakeQuantiles:
+    def __init__(self, values):
+        self.values = values
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.values
+
+
+class FakePipeline:
+    """Chronos stand-in: quantile k of a row = its last price + k"""
+
+    def __init__(self):
+        self.contexts = []
+
+    def predict_quantiles(self, context, prediction_length, quantile_levels):
+        self.contexts.append(context.copy())
+        last = context[:, -1].astype(np.float64)
+        q = last[:, None, None] + np.arange(len(quantile_levels))[None, None, :]
+        return FakeQuantiles(np.repeat(q, prediction_length, axis=1)), None
+
+
+def test_predict_batch_pads_chunks_and_keeps_input_order():
+    import types
+    import ml_models
+
+    saved = ml_models.CHRONOS_AVAILABLE, getattr(ml_models, 'torch', None)
+    ml_models.CHRONOS_AVAILABLE = True
+    ml_models.torch = types.SimpleNamespace(as_tensor=lambda a: a)
+    try:
+        chronos = ml_models.ChronosPredictor()
+        pipeline = FakePipeline()
+        chronos._load = lambda: pipeline
+        series = [np.arange(40.0) + 1, np.arange(100.0) + 1000, np.arange(5.0),
+                  np.arange(35.0) + 500, np.arange(60.0) + 2000]
+        results = chronos.predict_batch(series, days=3, batch_size=2)
+
+        # length-sorted chunks of 2: (35, 40) then (60, 100), left-padded with NaN
+        assert [c.shape for c in pipeline.contexts] == [(2, 40), (2, 100)]
+        first, second = pipeline.contexts
+        assert np.isnan(first[0, :5]).all() and np.array_equal(first[0, 5:], series[3])
+        assert np.array_equal(first[1], series[0])
+        assert np.isnan(second[0, :40]).all() and np.array_equal(second[0, 40:], series[4])
+        assert np.array_equal(second[1], series[1])
+
+        # results back in input order; too short a series gets None
+        assert results[2] is None
+        for i in (0, 1, 3, 4):
+            last = series[i][-1]
+            assert results[i] == {'low': [last] * 3, 'median': [last + 1] * 3, 'high': [last + 2] * 3}
+    finally:
+        ml_models.CHRONOS_AVAILABLE, torch = saved
+        if torch is None:
+            del ml_models.torch
+        else:
+            ml_models.torch = torch
+
+
+def test_predict_many_short_history_is_none():
+    forecast, confidence, model = MLPredictor().predict_many(make_series())['TINY']
+    assert (forecast, confidence, model) == ({}, 0.0, 'none')
+
+
+def test_predict_memo_recomputes_on_new_candle_or_window():
+    predictor = MLPredictor()
+    closes = make_series()['LONG']
+    candles = CandleArrays(np.arange(len(closes)) * 86400, closes, closes, closes, closes,
+                           np.ones(len(closes)))
+    first, fresh = predictor.predict_memo('SBER', candles, days=7)
+    assert fresh
+    second, fresh = predictor.predict_memo('SBER', candles, days=7)
+    assert not fresh and second == first
+    _, fresh = predictor.predict_memo('SBER', candles.tail(len(candles) - 1), days=7)
+    assert fresh      # same newest candle, shorter window
+    _, fresh = predictor.predict_memo('SBER', candles.tail(len(candles) - 1), days=7)
+    assert not fresh
+    _, fresh = predictor.predict_memo('SBER', candles, days=14)
+    assert fresh      # other horizon
+    stats = predictor.memo.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (2, 3, 3)
+
+
+def test_memo_evicts_least_recently_used():
+    memo = ForecastMemo(max_entries=2)
+    memo.put('a', 1)
+    memo.put('b', 2)
+    memo.get('a')
+    memo.put('c', 3)
+    assert 'a' in memo and 'c' in memo and 'b' not in memo
+
+
+def test_stored_forecast_matches_the_input_window():
+    import asyncio
+    import tempfile
+    from database import Database
+
+    async def main():
+        db = Database(db_path=f"{tempfile.mkdtemp()}/test.db")
+        try:
+            await db.init_db()
+            short = ('SBER', 1000, 5000, 7, 'sma')
+            long = ('SBER', 0, 5000, 7, 'sma')
+            forecast = {'median': [100.0 + d for d in range(7)], 'low': [99.0] * 7, 'high': [101.0] * 7}
+            await db.save_forecast_memo(short, (forecast, 0.5, 'sma'))
+            # same newest candle, longer window: not this forecast
+            assert await db.get_forecast_memo(long) is None
+            await db.save_forecast_memo(long, ({**forecast, 'median': [1.0] * 7}, 0.4, 'sma'))
+            # both windows keep their own forecast for the same dates
+            assert await db.get_forecast_memo(short) == (forecast, 0.5, 'sma')
+            assert (await db.get_forecast_memo(long))[0]['median'] == [1.0] * 7
+            # a newer candle supersedes both
+            await db.save_forecast_memo(('SBER', 1060, 5060, 7, 'sma'), (forecast, 0.5, 'sma'))
+            assert await db.get_forecast_memo(short) is None
+        finally:
+            await db.close()
+    asyncio.run(main())
+
+
+if __name__ == '__main__':
+    import sys
+    failures = 0
+    for name, fn in sorted(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            try:
+                fn()
+                print(f"PASS {name}")
+            except AssertionError as e:
+                failures += 1
+                print(f"FAIL {name}: {e}")
+    sys.exit(1 if failures else 0)
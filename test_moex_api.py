@@ -0,0 +1,431 @@
+"""
+Unit tests for moex_api.py request coalescing, against a local ISS stand-in
+Run: venv/bin/python -m pytest test_moex_api.py -q  (or python test_moex_api.py)
+"""
+import asyncio
+import tempfile
+import time
+
+from aiohttp import web
+
+from cache import CacheManager
+from moex_api import ISSPageError, MOEXClient
+
+
+async def start_server(calls: list, status: int = 200):
+    async def handler(request):
+        calls.append(request.rel_url.query.get('q'))
+        await asyncio.sleep(0.05)
+        return web.json_response({'q': request.rel_url.query.get('q'), 'n': len(calls)}, status=status)
+
+    app = web.Application()
+    app.router.add_get('/iss/{method}.json', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/iss"
+
+
+def test_identical_requests_share_one_upstream_call():
+    async def main():
+        calls = []
+        runner, base_url = await start_server(calls)
+        try:
+            async with MOEXClient() as client:
+                client.BASE_URL = base_url
+                results = await asyncio.gather(
+                    *(client.query("search", q="SBER") for _ in range(5)),
+                    client.query("search", q="GAZP"))
+                assert [r['q'] for r in results] == ['SBER'] * 5 + ['GAZP']
+                assert sorted(calls) == ['GAZP', 'SBER']
+                stats = client.stats()
+                assert (stats['upstream'], stats['coalesced'], stats['inflight']) == (2, 4, 0)
+                # finished requests are not reused
+                await client.query("search", q="SBER")
+                assert len(calls) == 3
+        finally:
+            await runner.cleanup()
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_does_not_cancel_shared_fetch():
+    async def main():
+        calls = []
+        runner, base_url = await start_server(calls)
+        try:
+            async with MOEXClient() as client:
+                client.BASE_URL = base_url
+                first = asyncio.ensure_future(client.query("search", q="SBER"))
+                second = asyncio.ensure_future(client.query("search", q="SBER"))
+                await asyncio.sleep(0.01)
+                first.cancel()
+                assert (await second)['q'] == 'SBER'
+                assert len(calls) == 1
+        finally:
+            await runner.cleanup()
+    asyncio.run(main())
+
+
+def test_abandoned_request_is_cancelled_before_it_is_cached():
+    async def main():
+        calls = []
+        runner, base_url = await start_server(calls)
+        try:
+            cache = CacheManager(cache_dir=tempfile.mkdtemp())
+            async with MOEXClient(cache_manager=cache) as client:
+                client.BASE_URL = base_url
+                only_waiter = asyncio.ensure_future(client.query("search", q="SBER"))
+                await asyncio.sleep(0.01)
+                only_waiter.cancel()
+                await asyncio.sleep(0.1)
+                assert client.stats()['inflight'] == 0
+                # the abandoned answer was never written to the cache
+                assert (await client.query("search", q="SBER"))['n'] == 2
+        finally:
+            await runner.cleanup()
+    asyncio.run(main())
+
+
+def test_stale_entry_is_served_while_refreshing():
+    async def main():
+        calls = []
+        runner, base_url = await start_server(calls)
+        try:
+            cache = CacheManager(cache_dir=tempfile.mkdtemp())
+            async with MOEXClient(cache_manager=cache, stale_hours=1) as client:
+                client.BASE_URL = base_url
+                assert (await client.query("search", q="SBER"))['n'] == 1
+                # ttl 0: already stale, answered at once from cache
+                started = time.perf_counter()
+                assert (await client.query("search", cache_ttl_hours=0, q="SBER"))['n'] == 1
+                assert time.perf_counter() - started < 0.04
+                await asyncio.sleep(0.1)  # background refresh lands
+                assert (await client.query("search", q="SBER"))['n'] == 2
+                stats = client.stats()
+                assert (stats['stale_served'], stats['upstream'], stats['cache_hits']) == (1, 2, 1)
+        finally:
+            await runner.cleanup()
+    asyncio.run(main())
+
+
+def test_failures_are_negatively_cached():
+    async def main():
+        calls = []
+        runner, base_url = await start_server(calls, status=503)
+        try:
+            async with MOEXClient(negative_ttl=60) as client:
+                client.BASE_URL = base_url
+                for _ in range(3):
+                    assert await client.query("search", q="SBER") is None
+                assert len(calls) == 1
+                assert client.stats()['negative_hits'] == 2
+                assert await client.query("search", q="GAZP") is None  # other key unaffected
+                assert len(calls) == 2
+        finally:
+            await runner.cleanup()
+    asyncio.run(main())
+
+
+async def start_candles_server(total: int, requests_seen: list, fail_at: set = frozenset()):
+    """ISS-like candles endpoint: 500 rows per page, start= cursor; pages
+    starting at `fail_at` answer 500"""
+    async def handler(request):
+        start = int(request.rel_url.query.get('start', 0))
+        requests_seen.append(start)
+        if start in fail_at:
+            return web.json_response({}, status=500)
+        rows = [[100.0 + i, 101.0 + i, 102.0 + i, 99.0 + i, 1000.0, 10 + i,
+                 f"2020-01-01 00:{i % 60:02d}:00", f"2020-01-01 00:{i % 60:02d}:59"]
+                for i in range(start, min(start + 500, total))]
+        return web.json_response({"candles": {
+            "columns": ["open", "close", "high", "low", "value", "volume", "begin", "end"],
+            "data": rows}})
+
+    app = web.Application()
+    app.router.add_get('/iss/{tail:.*}', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/iss"
+
+
+def test_get_candles_walks_all_pages():
+    async def main():
+        seen = []
+        runner, base_url = await start_candles_server(1234, seen)
+        try:
+            async with MOEXClient() as client:
+                client.BASE_URL = base_url
+                candles = await client.get_candles("SBER", interval=1, use_cache=False)
+                assert len(candles) == 1234
+                assert candles[0]['open'] == 100.0 and candles[-1]['volume'] == 10 + 1233
+                assert sorted(seen) == [0, 500, 1000]
+        finally:
+            await runner.cleanup()
+    asyncio.run(main())
+
+
+def test_failed_candle_page_raises_or_is_counted():
+    async def main():
+        seen = []
+        runner, base_url = await start_candles_server(1234, seen, fail_at={500})
+        try:
+            async with MOEXClient() as client:
+                client.BASE_URL = base_url
+                try:
+                    await client.get_candles_arrays("SBER", interval=1, use_cache=False, strict=True)
+                    assert False, "a failed middle page must not pass as the full range"
+                except ISSPageError:
+                    pass
+                candles = await client.get_candles_arrays("SBER", interval=1, use_cache=False)
+                assert len(candles) == 500 and client.stats()['truncated_walks'] == 1
+        finally:
+            await runner.cleanup()
+    asyncio.run(main())
+
+
+def test_iter_candles_prefetch_and_early_stop():
+    async def main():
+        seen = []
+        runner, base_url = await start_candles_server(5000, seen)
+        try:
+            async with MOEXClient() as client:
+                client.BASE_URL = base_url
+                count = 0
+                async for _ in client.iter_candles("SBER", interval=1, use_cache=False, prefetch=2):
+                    count += 1
+                    if count == 600:
+                        break
+                await asyncio.sleep(0.05)
+                # page 2 being consumed, at most 2 pages requested ahead of it
+                assert count == 600
+                assert len(seen) <= 4
+        finally:
+            await runner.cleanup()
+    asyncio.run(main())
+
+
+def test_next_pages_are_in_flight_while_a_page_is_consumed():
+    async def main():
+        seen = []
+        runner, base_url = await start_candles_server(5000, seen)
+        try:
+            async with MOEXClient() as client:
+                client.BASE_URL = base_url
+                for prefetch, expected in ((1, [0, 500]), (2, [0, 500, 1000])):
+                    seen.clear()
+                    async for _ in client.iter_candle_arrays("SBER", interval=1, use_cache=False,
+                                                             prefetch=prefetch):
+                        # consumer still holds the first page
+                        await asyncio.sleep(0.05)
+                        assert sorted(seen) == expected
+                        break
+        finally:
+            await runner.cleanup()
+    asyncio.run(main())
+
+
+async def start_board_server(requests_seen: list, lookup_delay: float = 0.0):
+    """ISS-like board securities (securities + marketdata) and security boards"""
+    async def handler(request):
+        tail = request.match_info['tail']
+        requests_seen.append(tail)
+        if tail.startswith('securities/'):
+            await asyncio.sleep(lookup_delay)
+            return web.json_response({"boards": {
+                "columns": ["boardid", "market", "engine", "is_primary", "is_traded"],
+                "data": [["TQBR", "shares", "stock", 1, 1]]}})
+        return web.json_response({
+            "securities": {"columns": ["SECID", "BOARDID", "SHORTNAME", "PREVPRICE", "LOTSIZE"],
+                           "data": [["SBER", "TQBR", "Сбербанк", 300.0, 10],
+                                    ["GAZP", "TQBR", "Газпром", 150.0, 10],
+                                    ["LKOH", "TQBR", "Лукойл", 7000.0, 1]]},
+            "marketdata": {"columns": ["SECID", "LAST", "MARKETPRICE", "VOLTODAY", "VALTODAY", "UPDATETIME"],
+                           "data": [["SBER", 303.0, 302.5, 1000, 303000.0, "16:00:00"],
+                                    ["GAZP", None, 151.0, 0, 0.0, "16:00:00"],
+                                    ["LKOH", None, None, 0, 0.0, "16:00:00"]]}})
+
+    app = web.Application()
+    app.router.add_get('/iss/{tail:.*}.json', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/iss"
+
+
+def test_board_snapshot_and_batch_last_prices():
+    async def main():
+        seen = []
+        runner, base_url = await start_board_server(seen, lookup_delay=0.2)
+        try:
+            async with MOEXClient() as client:
+                client.BASE_URL = base_url
+                snapshot = await client.get_board_snapshot("TQBR")
+                assert set(snapshot) == {"SBER", "GAZP", "LKOH"}
+                assert snapshot["SBER"]["volume"] == 1000
+                # LAST, then market price, then the previous close
+                assert [snapshot[s]["price"] for s in ("SBER", "GAZP", "LKOH")] == [303.0, 151.0, 7000.0]
+
+                seen.clear()
+                secids = ["SBER", "GAZP", "NOPE"]
+                started = time.perf_counter()
+                assert await client.get_last_prices(secids) == {"SBER": 300.0, "GAZP": 150.0}
+                assert time.perf_counter() - started < 0.4  # board lookups run concurrently
+                assert await client.get_last_prices(secids, live=True) == {"SBER": 303.0, "GAZP": 151.0}
+                board_calls = [t for t in seen if t.endswith('boards/TQBR/securities')]
+                assert len(board_calls) == 2  # one snapshot per batch, not per security
+        finally:
+            await runner.cleanup()
+    asyncio.run(main())
+
+
+async def start_history_server(requests_seen: list, fail_once: set, empty_days: set):
+    """ISS-like history by date: 250 rows in pages of 100 with a history.cursor
+    block, none on empty_days. Dates in fail_once answer 500 for their second
+    page the first time."""
+    async def handler(request):
+        trade_date = request.rel_url.query['date']
+        start = int(request.rel_url.query.get('start', 0))
+        requests_seen.append((trade_date, start))
+        if start and trade_date in fail_once:
+            fail_once.discard(trade_date)
+            return web.json_response({}, status=500)
+        total = 0 if trade_date in empty_days else 250
+        rows = [[f"S{i:03d}", trade_date, 100.0 + i, 99.0, 102.0, 101.0 + i, 1000 + i]
+                for i in range(start, min(start + 100, total))]
+        return web.json_response({
+            "history": {"columns": ["SECID", "TRADEDATE", "OPEN", "LOW", "HIGH", "CLOSE", "VOLUME"],
+                        "data": rows},
+            "history.cursor": {"columns": ["INDEX", "TOTAL", "PAGESIZE"],
+                               "data": [[start, total, 100]]}})
+
+    app = web.Application()
+    app.router.add_get('/iss/{tail:.*}', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/iss"
+
+
+def test_backfill_board_skips_completed_days():
+    import sqlite3
+    from datetime import date
+    from advisor import backfill_board
+    from database import Database
+
+    async def main():
+        # 2024-03-05..08; the 7th has no trades, the 8th fails mid-walk once
+        seen, fail_once = [], {"2024-03-08"}
+        runner, base_url = await start_history_server(seen, fail_once, {"2024-03-07"})
+        db_path = f"{tempfile.mkdtemp()}/test.db"
+        db = Database(db_path=db_path)
+        try:
+            await db.init_db()
+            async with MOEXClient() as client:
+                client.BASE_URL = base_url
+                first = await backfill_board(client, db, "stock/shares/TQBR", days=4,
+                                             till=date(2024, 3, 8))
+                assert (first["filled"], first["failed"], first["candles"]) == (3, 1, 500)
+
+            seen.clear()
+            async with MOEXClient() as client:  # a later run: no negative cache
+                client.BASE_URL = base_url
+                second = await backfill_board(client, db, "stock/shares/TQBR", days=4,
+                                              till=date(2024, 3, 8))
+                assert (second["skipped"], second["filled"], second["failed"]) == (3, 1, 0)
+                assert sorted(seen) == [("2024-03-08", s) for s in (0, 100, 200)]
+            assert await db.get_backfilled_dates("TQBR", "2024-03-01", "2024-03-31") == {
+                "2024-03-05", "2024-03-06", "2024-03-07", "2024-03-08"}
+        finally:
+            await db.close()
+            await runner.cleanup()
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM candles").fetchone()[0] == 750
+    asyncio.run(main())
+
+
+def test_backfill_board_rechecks_recent_empty_days():
+    from datetime import date, timedelta
+    from advisor import backfill_board
+    from database import Database
+
+    async def main():
+        yesterday = date.today() - timedelta(days=1)
+        recent = {yesterday.isoformat(), (yesterday - timedelta(days=1)).isoformat()}
+        seen = []
+        runner, base_url = await start_history_server(seen, set(), recent)
+        db = Database(db_path=f"{tempfile.mkdtemp()}/test.db")
+        try:
+            await db.init_db()
+            async with MOEXClient() as client:
+                client.BASE_URL = base_url
+                for _ in range(2):
+                    result = await backfill_board(client, db, "stock/shares/TQBR", days=2)
+                    assert (result["skipped"], result["filled"], result["pending"]) == (0, 0, 2)
+            # not published yet: asked again on the second run
+            assert sorted(d for d, _ in seen) == sorted(list(recent) * 2)
+        finally:
+            await db.close()
+            await runner.cleanup()
+    asyncio.run(main())
+
+
+def test_projection_is_sent_and_keys_the_cache():
+    async def main():
+        seen = []
+
+        async def handler(request):
+            seen.append(dict(request.rel_url.query))
+            return web.json_response({"securities": {"columns": ["SECID"], "data": [["SBER"]]}})
+
+        app = web.Application()
+        app.router.add_get('/iss/{tail:.*}', handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            cache = CacheManager(cache_dir=tempfile.mkdtemp())
+            async with MOEXClient(cache_manager=cache) as client:
+                client.BASE_URL = f"http://127.0.0.1:{port}/iss"
+                assert await client.get_securities() == [{"SECID": "SBER"}]
+                assert seen[0]['iss.meta'] == 'off'
+                assert seen[0]['iss.only'] == 'securities'
+                assert seen[0]['securities.columns'].split(',')[:3] == ["SECID", "BOARDID", "SHORTNAME"]
+                # same endpoint, another projection: not answered from that cache entry
+                await client.query("engines/stock/markets/shares/boards/TQBR/securities",
+                                   only={"marketdata": ["SECID", "LAST"]})
+                assert len(seen) == 2 and seen[1]['iss.only'] == 'marketdata'
+                await client.get_securities()
+                assert len(seen) == 2
+                # paginated walks keep their cursor block
+                async for _ in client.query_pages("history/x", "history", only={"history": ["SECID"]}):
+                    pass
+                assert seen[-1]['iss.only'] == 'history,history.cursor'
+                assert 'history.cursor.columns' not in seen[-1]
+        finally:
+            await runner.cleanup()
+    asyncio.run(main())
+
+
+if __name__ == '__main__':
+    import sys
+    failures = 0
+    for name, fn in sorted(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            try:
+                fn()
+                print(f"PASS {name}")
+            except AssertionError as e:
+                failures += 1
+                print(f"FAIL {name}: {e}")
+    sys.exit(1 if failures else 0)
@@ -22,6 +22,13 @@ def test_tsmom_insufficient_data():
     assert m['m3'] is None
 
 
+def test_tsmom_and_vol_accept_arrays():
+    prices = list(np.linspace(100, 200, 300))
+    arr = np.asarray(prices, dtype=np.float64)
+    assert strategy.tsmom(arr) == strategy.tsmom(prices)
+    assert strategy.ann_vol(arr) == strategy.ann_vol(prices)
+
+
 def test_regime_10m_sma_flip():
     growing = list(np.linspace(100, 200, 24))
     falling = list(np.linspace(200, 100, 24))
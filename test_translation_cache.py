@@ -0,0 +1,61 @@
+"""
+Unit tests for translation_cache.py
+Run: venv/bin/python -m pytest test_translation_cache.py -q  (or python test_translation_cache.py)
+"""
+import os
+import tempfile
+
+from translation_cache import TranslationCache
+
+
+def make_cache(max_entries: int = 100):
+    return TranslationCache(os.path.join(tempfile.mkdtemp(), "cache.db"), max_entries=max_entries)
+
+
+def test_bulk_lookup_returns_hits_only():
+    cache = make_cache()
+    cache.put_many({('Russian', 'English', 'привет'): 'hello',
+                    ('English', 'Russian', 'hello'): 'привет'})
+    found = cache.get_many([('Russian', 'English', 'привет'),
+                            ('English', 'Russian', 'привет'),
+                            ('Russian', 'English', 'пока')])
+    assert found == {('Russian', 'English', 'привет'): 'hello'}
+    assert cache.stats() == {'entries': 2, 'hits': 1, 'misses': 2}
+    cache.close()
+
+
+def test_persists_across_instances():
+    path = os.path.join(tempfile.mkdtemp(), "cache.db")
+    cache = TranslationCache(path)
+    cache.put('Russian', 'English', 'дивиденды', 'dividends')
+    cache.close()
+    cache = TranslationCache(path)
+    assert cache.get('Russian', 'English', 'дивиденды') == 'dividends'
+    cache.close()
+
+
+def test_eviction_drops_least_recently_used():
+    cache = make_cache(max_entries=10)
+    for i in range(10):
+        cache.put('Russian', 'English', f'text {i}', f'translation {i}')
+    cache.get('Russian', 'English', 'text 0')  # touch the oldest entry
+    cache.put('Russian', 'English', 'text 10', 'translation 10')
+    assert len(cache) == 9
+    assert cache.get('Russian', 'English', 'text 0') == 'translation 0'
+    assert cache.get('Russian', 'English', 'text 1') is None
+    assert cache.get('Russian', 'English', 'text 10') == 'translation 10'
+    cache.close()
+
+
+if __name__ == '__main__':
+    import sys
+    failures = 0
+    for name, fn in sorted(globals().items()):
+        if name.startswith('test_') and callable(fn):
+            try:
+                fn()
+                print(f"PASS {name}")
+            except AssertionError as e:
+                failures += 1
+                print(f"FAIL {name}: {e}")
+    sys.exit(1 if failures else 0)
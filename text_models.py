@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import List, Optional, Tuple
 import torch
 import torch.nn.functional as F
 import torchvision
@@ -44,6 +44,21 @@ class SentimentAnalyzer:
         # 0=negative, 1=neutral, 2=positive
         return {"negative": round(probs[0].item(), 4), "neutral": round(probs[1].item(), 4), "positive": round(probs[2].item(), 4)}
 
+    def analyze_batch(self, texts: List[str], batch_size: int = 16) -> List[dict]:
+        """analyze() for many texts, same order. Texts are sorted by length so
+        each bucket pads only to its own longest member."""
+        results = [None] * len(texts)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), batch_size):
+            bucket = order[start:start + batch_size]
+            inputs = self.tokenizer([texts[i] for i in bucket], return_tensors="pt", padding=True,
+                                    truncation=True, max_length=512).to(self.device)
+            with torch.no_grad():
+                probs = F.softmax(self.model(**inputs).logits, dim=-1).cpu().tolist()
+            for i, p in zip(bucket, probs):
+                results[i] = {"negative": round(p[0], 4), "neutral": round(p[1], 4), "positive": round(p[2], 4)}
+        return results
+
 
 class EmotionAnalyzer:
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -78,6 +93,21 @@ class EmotionAnalyzer:
 
         classes = self.classifier(text[:512])
         items = classes[0] if isinstance(classes[0], list) else classes
+        return self._labels(items)
+
+    def analyze_batch(self, texts: List[str], batch_size: int = 16) -> List[dict]:
+        """analyze() for many texts, same order; length-sorted so the pipeline
+        pads each batch only to its own longest member."""
+        results = [{} for _ in texts]
+        order = sorted((i for i, t in enumerate(texts) if t.strip()), key=lambda i: len(texts[i]))
+        if not order:
+            return results
+        outputs = self.classifier([texts[i][:512] for i in order], batch_size=batch_size)
+        for i, items in zip(order, outputs):
+            results[i] = self._labels(items)
+        return results
+
+    def _labels(self, items: list) -> dict:
         return {
             self.LABEL_MAP.get(c.get('label'), c.get('label')): round(c.get('score'), 4)
             for c in items
@@ -230,6 +260,34 @@ class TextAnalyser:
 
     def _analyze_neural_networks_sync(self, text: str, img_path: str = None) -> Optional[dict]:
         """Synchronous version of neural network analysis (for thread pool execution)"""
+        analys = self._distill_sync(text, img_path)
+        if analys is None:
+            return None
+        prediction = self.sentiment_analyzer.analyze(analys)
+        emotion = self.emotion_analyzer.analyze(analys)
+        return self._combine(prediction, emotion)
+
+    def analyze_batch_sync(self, items: List[Tuple[str, Optional[str]]], batch_size: int = 16) -> List[Optional[dict]]:
+        """Batch version of _analyze_neural_networks_sync over (text, img_path)
+        pairs: the LLM/keyword gate still runs per item, FinBERT and the
+        emotion model run once per bucket over the texts that pass it."""
+        results: List[Optional[dict]] = [None] * len(items)
+        kept = []
+        for i, (text, img_path) in enumerate(items):
+            analys = self._distill_sync(text, img_path)
+            if analys is not None:
+                kept.append((i, analys))
+        if not kept:
+            return results
+        texts = [analys for _, analys in kept]
+        predictions = self.sentiment_analyzer.analyze_batch(texts, batch_size=batch_size)
+        emotions = self.emotion_analyzer.analyze_batch(texts, batch_size=batch_size)
+        for (i, _), prediction, emotion in zip(kept, predictions, emotions):
+            results[i] = self._combine(prediction, emotion)
+        return results
+
+    def _distill_sync(self, text: str, img_path: str = None) -> Optional[str]:
+        """Text to feed the sentiment models, or None if the post is off-topic"""
         if not text:
             return None
 
@@ -249,15 +307,14 @@ class TextAnalyser:
 
         if not self.process_text_sentiment(analys):
             return None
+        return analys
 
-        # Sentiment analysis
-        prediction = self.sentiment_analyzer.analyze(analys)
+    @staticmethod
+    def _combine(prediction: dict, emotion: dict) -> dict:
         negative = prediction.get("negative")
         positive = prediction.get("positive")
         neutral = prediction.get("neutral")
 
-        # Emotion analysis
-        emotion = self.emotion_analyzer.analyze(analys)
         if positive == negative or neutral > 0.5:
             emotion["negative"] = negative
             emotion["positive"] = positive
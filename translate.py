@@ -6,6 +6,8 @@ import logging
 import argostranslate.package
 import argostranslate.translate  # pip install argostranslate
 
+from translation_cache import TranslationCache
+
 
 logging.getLogger("argostranslate").setLevel(logging.WARNING)
 logging.getLogger("argostranslate.utils").setLevel(logging.WARNING)
@@ -13,15 +15,23 @@ logging.getLogger("argostranslate.utils").setLevel(logging.WARNING)
 logging.getLogger("stanza").setLevel(logging.WARNING)
 logging.getLogger("stanza.pipeline").setLevel(logging.WARNING)
 
+# Resolved argos translation objects per (src, trg), shared by every
+# Translate in the process; cleared when a package gets installed
+_translators = {}
+
 
 class Translate:
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     MODEL_PATH = os.path.join(BASE_DIR, "translate")
 
-    def __init__(self):
+    CACHE_PATH = os.path.join(MODEL_PATH, "cache.db")
+
+    def __init__(self, cache_entries: int = 100_000):
         if not os.path.exists(self.MODEL_PATH):
             os.makedirs(self.MODEL_PATH, exist_ok=True)
 
+        self.cache = TranslationCache(self.CACHE_PATH, max_entries=cache_entries)
+
         self.model_urls = {
             "Russian_English": "https://argos-net.com/v1/translate-ru_en-1_9.argosmodel",
             "English_Russian": "https://argos-net.com/v1/translate-en_ru-1_9.argosmodel"
@@ -96,6 +106,7 @@ class Translate:
         if await self.check_download_size(download_path, download_link):
             package_path = pathlib.Path(download_path)
             argostranslate.package.install_from_path(package_path)
+            self.invalidate()
             return True
         return False
 
@@ -111,23 +122,64 @@ class Translate:
         except ValueError:
             return -1, -1, installed_languages
 
-    async def translate(self, text, src_lang='Russian', trg_lang='English') -> str:
-        if not isinstance(text, str):
-            return text
-
-        src_idx, tgt_idx, installed_languages = self.get_language_indices(src_lang, trg_lang)
-
-        if src_idx == -1 or tgt_idx == -1:
-            if await self.install_package(f"{src_lang}_{trg_lang}"):
-                src_idx, tgt_idx, installed_languages = self.get_language_indices(src_lang, trg_lang)
-            else:
-                return text
+    def resolve(self, src_lang: str, trg_lang: str):
+        """Installed translation object for the pair (registry hit after the
+        first call), or None if the package is not installed"""
+        translation = _translators.get((src_lang, trg_lang))
+        if translation is None:
+            src_idx, tgt_idx, installed_languages = self.get_language_indices(src_lang, trg_lang)
+            if src_idx == -1 or tgt_idx == -1:
+                return None
+            translation = installed_languages[src_idx].get_translation(installed_languages[tgt_idx])
+            if translation is not None:
+                _translators[(src_lang, trg_lang)] = translation
+        return translation
 
-        translation = installed_languages[src_idx].get_translation(installed_languages[tgt_idx])
+    @staticmethod
+    def invalidate():
+        _translators.clear()
+
+    def warm_up(self, pairs=(('Russian', 'English'), ('English', 'Russian'))):
+        """Resolve the installed pairs up front (worker start); missing
+        packages are still installed lazily on first translate()"""
+        for src_lang, trg_lang in pairs:
+            self.resolve(src_lang, trg_lang)
+
+    async def get_translation(self, src_lang: str, trg_lang: str):
+        translation = self.resolve(src_lang, trg_lang)
+        if translation is None and await self.install_package(f"{src_lang}_{trg_lang}"):
+            translation = self.resolve(src_lang, trg_lang)
         if translation is None:
             print("Error. The language pack is not installed.")
+        return translation
+
+    def lookup_many(self, items) -> dict:
+        """Cached translations for [(src_lang, trg_lang, text), ...] in one query"""
+        return self.cache.get_many(items)
+
+    async def translate(self, text, src_lang='Russian', trg_lang='English') -> str:
+        if not isinstance(text, str):
             return text
-        # argos translate is a heavy synchronous CPU call: run it in the default
-        # executor so it does not freeze the event loop for the whole server
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, translation.translate, text)
+        return (await self.translate_many([text], src_lang=src_lang, trg_lang=trg_lang))[0]
+
+    async def translate_many(self, texts: list, src_lang='Russian', trg_lang='English',
+                             lookup: bool = True) -> list:
+        """translate() over a list: cache hits first, then every miss in a
+        single executor job; same order as `texts`. lookup=False skips the
+        cache query when the caller already found `texts` missing there
+        (see lookup_many)."""
+        items = [(src_lang, trg_lang, t) for t in texts if isinstance(t, str)]
+        found = self.cache.get_many(items) if lookup else {}
+        missing = list(dict.fromkeys(t for _, _, t in items if (src_lang, trg_lang, t) not in found))
+        if missing:
+            translation = await self.get_translation(src_lang, trg_lang)
+            if translation is not None:
+                # argos translate is a heavy synchronous CPU call: run it in the default
+                # executor so it does not freeze the event loop for the whole server
+                loop = asyncio.get_event_loop()
+                translated = await loop.run_in_executor(
+                    None, lambda: [translation.translate(t) for t in missing])
+                fresh = {(src_lang, trg_lang, t): tr for t, tr in zip(missing, translated)}
+                self.cache.put_many(fresh)
+                found.update(fresh)
+        return [found.get((src_lang, trg_lang, t), t) if isinstance(t, str) else t for t in texts]
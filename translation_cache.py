@@ -0,0 +1,117 @@
+"""
+Persistent translation cache for the Argos wrapper
+
+Entries are content-addressed by sha1(src, trg, text) in a local SQLite
+file, so re-parsed and cross-posted reviews skip Argos entirely. The table
+is bounded by entry count; the least recently used rows go first.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+MAX_SQL_VARIABLES = 900
+
+# (src_lang, trg_lang, text)
+Item = Tuple[str, str, str]
+
+
+def translation_key(src_lang: str, trg_lang: str, text: str) -> str:
+    return hashlib.sha1(f"{src_lang}\0{trg_lang}\0{text}".encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """SQLite-backed (src, trg, text) -> translation map with LRU eviction"""
+
+    def __init__(self, path: str, max_entries: int = 100_000):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.logger = logging.getLogger("translate")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                key TEXT PRIMARY KEY,
+                translation TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations(last_used)")
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, src_lang: str, trg_lang: str, text: str) -> Optional[str]:
+        return self.get_many([(src_lang, trg_lang, text)]).get((src_lang, trg_lang, text))
+
+    def get_many(self, items: Iterable[Item]) -> Dict[Item, str]:
+        """Bulk lookup: {item: translation} for the cached items only"""
+        keys = {translation_key(*item): item for item in items}
+        found: Dict[Item, str] = {}
+        if not keys:
+            return found
+        key_list = list(keys)
+        with self._lock:
+            for i in range(0, len(key_list), MAX_SQL_VARIABLES):
+                chunk = key_list[i:i + MAX_SQL_VARIABLES]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, translation FROM translations WHERE key IN ({placeholders})",
+                    chunk).fetchall()
+                for key, translation in rows:
+                    found[keys[key]] = translation
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE translations SET last_used = ? WHERE key = ?",
+                    [(now, translation_key(*item)) for item in found])
+                self._conn.commit()
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put(self, src_lang: str, trg_lang: str, text: str, translation: str):
+        self.put_many({(src_lang, trg_lang, text): translation})
+
+    def put_many(self, translations: Dict[Item, str]):
+        if not translations:
+            return
+        now = time.time()
+        rows = [(translation_key(*item), translation, now)
+                for item, translation in translations.items() if isinstance(translation, str)]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations (key, translation, last_used) VALUES (?, ?, ?)",
+                rows)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # Trim 10% below the bound so a full cache does not evict on every put
+        count = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        excess = count - int(self.max_entries * 0.9)
+        self._conn.execute("""
+            DELETE FROM translations WHERE key IN (
+                SELECT key FROM translations ORDER BY last_used ASC, rowid ASC LIMIT ?
+            )
+        """, (excess,))
+        self.logger.info(f"Translation cache evicted {excess} entries")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()